@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the standard library date parsing in `free_game_notifier.dates` with
+pendulum over a synthetic feed with 10,000 entries, and measure the time it
+takes to import each of them.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.bench_dates
+"""
+import datetime
+import subprocess
+import sys
+import time
+
+import pendulum
+
+from free_game_notifier import dates
+
+ENTRIES = 10_000
+
+
+def pubdates(count=ENTRIES):
+    """Return `count` unique pubDate strings, newest first."""
+    start = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        (start - datetime.timedelta(minutes=17 * index)).strftime(
+            "%a, %d %b %Y %H:%M:%S +0000"
+        )
+        for index in range(count)
+    ]
+
+
+def import_time(module: str) -> float:
+    """Return the cumulative import time of `module` (in seconds) in a new process."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1_000_000
+
+    raise ValueError(f"{module} was not imported")
+
+
+def timed(func, values):
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+
+    return time.perf_counter() - start
+
+
+def main():
+    values = pubdates()
+    fmt = dates.RFC822_PENDULUM_FORMAT
+
+    for value in values[:100]:
+        assert dates.parse_rfc822(value) == pendulum.from_format(value, fmt)
+
+    dates.parse_rfc822.cache_clear()
+    before = timed(lambda value: pendulum.from_format(value, fmt), values)
+    after = timed(dates.parse_rfc822, values)
+    cached = timed(dates.parse_rfc822, values[-4096:])
+    print(
+        f"parse {ENTRIES} pubDates: pendulum {before * 1000:.1f}ms, "
+        f"stdlib {after * 1000:.1f}ms ({before / after:.1f}x faster), "
+        f"4096 memoized {cached * 1000:.1f}ms"
+    )
+
+    start = time.perf_counter()
+    for _ in range(ENTRIES):
+        pendulum.from_timestamp(1609344001).in_tz("America/Denver")
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ENTRIES):
+        dates.from_timestamp(1609344001, "America/Denver")
+    after = time.perf_counter() - start
+    print(
+        f"convert {ENTRIES} timestamps: pendulum {before * 1000:.1f}ms, "
+        f"stdlib {after * 1000:.1f}ms ({before / after:.1f}x faster)"
+    )
+
+    print(
+        f"import time: pendulum {import_time('pendulum') * 1000:.1f}ms, "
+        f"free_game_notifier.dates "
+        f"{import_time('free_game_notifier.dates') * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
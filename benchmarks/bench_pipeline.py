@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Time each stage of the pipeline against synthetic feeds, caches, and store
+pages of increasing size.
+
+Each result is the best of `--repeat` runs, in seconds, keyed by
+`<stage>/<size>`.  The results are written to a JSON file, and can be compared
+against a baseline (a previous results file) to flag regressions.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --baseline results.json
+
+Use `--sizes full` for feeds of up to 50k entries and caches of up to 1M keys.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from free_game_notifier.cache import JsonBackend, SqliteBackend, cache
+from free_game_notifier.config import configuration
+from free_game_notifier.feed.steam import Feed, Item, is_item_ignored
+from free_game_notifier.ignore import RuleSet
+
+from . import synthetic
+
+SIZES = {
+    "quick": {"feeds": [100, 1000], "caches": [1000, 10_000]},
+    "default": {"feeds": [100, 1000, 10_000], "caches": [1000, 10_000, 100_000]},
+    "full": {
+        "feeds": [100, 1000, 10_000, 50_000],
+        "caches": [1000, 10_000, 100_000, 1_000_000],
+    },
+}
+
+# The number of ignore rules to compare the combined pattern with
+IGNORE_RULES = [20, 300]
+
+# Rendering fetches and parses a store page per item, so only render this many
+RENDERED_ITEMS = 200
+STORE_PAGES = 10
+
+CONFIG = """
+---
+timezone: UTC
+cache_age: 30
+start_date: 2020-01-01
+feed_parser: stream
+notifiers:
+    slack:
+        - https://hooks.example.com/1
+ignore:
+    titles:
+{titles}
+    urls:
+{urls}
+"""
+
+
+def ignore_rules(count: int, field: str) -> str:
+    return "\n".join(f'        - ".*no-such-{field}-{n}.*"' for n in range(count))
+
+
+def measure(func, setup=None, repeat=3) -> float:
+    """Return the best time of `repeat` calls to `func(setup())`."""
+    best = None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def bench_feed(directory: str, size: int, repeat: int) -> dict:
+    path = os.path.join(directory, f"feed-{size}.xml")
+    with open(path, "wb") as fh:
+        fh.write(synthetic.make_feed(size))
+
+    results = {}
+    results[f"feed.read/{size}"] = measure(lambda _: Feed(url=path), repeat=repeat)
+
+    feed = Feed(url=path)
+    entries = list(feed._feed["items"])
+    assert len(entries) == size
+
+    def reset(_=None):
+        feed._feed = {"items": list(entries)}
+
+    results[f"filter_pubdate/{size}"] = measure(
+        lambda _: feed.filter_pubdate(), setup=reset, repeat=repeat
+    )
+    results[f"item/{size}"] = measure(
+        lambda _: [Item.from_rss_element(entry) for entry in entries], repeat=repeat
+    )
+
+    items = [Item.from_rss_element(entry) for entry in entries]
+    results[f"is_item_ignored/{size}"] = measure(
+        lambda _: [is_item_ignored(item) for item in items], repeat=repeat
+    )
+
+    return results
+
+
+def bench_ignore(size: int, repeat: int) -> dict:
+    """
+    Compare the combined ignore rules against searching each rule on its own,
+    which is how they were matched before they were combined.
+    """
+    titles = [f"Synthetic game {index} free from example.com" for index in range(size)]
+
+    def search_each(rules, value):
+        for rule in rules:
+            if re.search(rule, value, re.IGNORECASE):
+                return rule
+
+        return None
+
+    results = {}
+    for count in IGNORE_RULES:
+        rules = [f".*no-such-title-{n}.*" for n in range(count)]
+        rule_set = RuleSet(rules)
+
+        results[f"ignore.combined[{count}]/{size}"] = measure(
+            lambda _: [rule_set.search(title) for title in titles], repeat=repeat
+        )
+        results[f"ignore.each[{count}]/{size}"] = measure(
+            lambda _: [search_each(rules, title) for title in titles], repeat=repeat
+        )
+
+    return results
+
+
+def bench_render(directory: str, repeat: int) -> dict:
+    pages = []
+    for index in range(STORE_PAGES):
+        path = os.path.join(directory, f"store-{index}.html")
+        with open(path, "w") as fh:
+            fh.write(synthetic.make_store_page(index))
+
+        pages.append(path)
+
+    items = []
+    for index in range(RENDERED_ITEMS):
+        element = {
+            "title": f"Synthetic game {index}",
+            "summary": synthetic.SUMMARY.format(
+                store=synthetic.STORES[0].format(id=index), through="May 1,", id=index
+            ),
+            "link": f"https://steamcommunity.com/announcements/detail/{index}",
+            "published": synthetic.pubdate(index),
+        }
+        item = Item.from_rss_element(element)
+
+        # Read the store page from a local file instead of the network
+        item.steam_store_link = pages[index % len(pages)]
+        items.append(item)
+
+    elapsed = measure(
+        lambda _: [item.to_slack_message() for item in items], repeat=repeat
+    )
+    return {f"to_slack_message/{RENDERED_ITEMS}": elapsed}
+
+
+def bench_cache(directory: str, size: int, repeat: int) -> dict:
+    json_path = os.path.join(directory, f"cache-{size}.json")
+    synthetic.write_cache(json_path, size)
+
+    # The synthetic cache uses the old layout, so convert it first
+    JsonBackend(json_path).save()
+
+    db_path = os.path.join(directory, f"cache-{size}.sqlite3")
+    SqliteBackend(db_path, json_path=json_path).close()
+
+    def reload(backend):
+        cache.path, cache.age = json_path, 30
+        cache.backend = backend
+        return backend
+
+    def close():
+        if cache.backend:
+            cache.backend.close()
+            cache.backend = None
+
+    def load_json(_=None):
+        close()
+        backend = JsonBackend(json_path)
+
+        # Save to a copy so every run starts with the same entries
+        backend.path = os.path.join(directory, "copy.json")
+        return reload(backend)
+
+    def load_sqlite(_=None):
+        close()
+        copy_path = os.path.join(directory, "copy.sqlite3")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(copy_path + suffix):
+                os.remove(copy_path + suffix)
+
+        shutil.copy(db_path, copy_path)
+        return reload(SqliteBackend(copy_path))
+
+    def save(backend):
+        backend.add("new", {"title": "new", "posted": time.time()})
+        cache.save()
+
+    results = {}
+    results[f"cache.load[json]/{size}"] = measure(
+        lambda _: JsonBackend(json_path), repeat=repeat
+    )
+    for name, load in [("json", load_json), ("sqlite", load_sqlite)]:
+        results[f"cache.invalidate[{name}]/{size}"] = measure(
+            lambda _: cache.invalidate(), setup=load, repeat=repeat
+        )
+        results[f"cache.save[{name}]/{size}"] = measure(
+            save, setup=load, repeat=repeat
+        )
+
+    close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return the `(name, baseline, result, ratio)` of every result that's more
+    than `threshold` times slower than the baseline.
+    """
+    regressions = []
+    for name, elapsed in sorted(results.items()):
+        if name in baseline and baseline[name]:
+            ratio = elapsed / baseline[name]
+            if ratio > threshold:
+                regressions.append((name, baseline[name], elapsed, ratio))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", choices=SIZES, default="default")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="flag results this many times slower than the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    configuration.load_config(
+        CONFIG.format(titles=ignore_rules(20, "title"), urls=ignore_rules(20, "url"))
+    )
+    configuration["dry-run"] = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        configuration["cache_path"] = os.path.join(directory, "cache.json")
+
+        for size in SIZES[args.sizes]["feeds"]:
+            results.update(bench_feed(directory, size, args.repeat))
+            results.update(bench_ignore(size, args.repeat))
+
+        results.update(bench_render(directory, args.repeat))
+
+        for size in SIZES[args.sizes]["caches"]:
+            results.update(bench_cache(directory, size, args.repeat))
+
+    for name, elapsed in results.items():
+        print(f"{name:40s} {elapsed * 1000:10.2f}ms")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "created": time.time(),
+                    "sizes": args.sizes,
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                fh,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"\n{len(regressions)} regressions (more than {args.threshold}x):")
+            for name, before, after, ratio in regressions:
+                print(
+                    f"{name:40s} {before * 1000:10.2f}ms -> {after * 1000:10.2f}ms "
+                    f"({ratio:.2f}x)"
+                )
+
+            return 1
+
+        print(f"\nNo regressions (more than {args.threshold}x) against the baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the store page ratings extractor against the original implementation,
+which parsed the whole page once per rating using uncompiled XPath queries.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.bench_ratings
+"""
+import timeit
+
+from lxml import html
+
+from free_game_notifier.feed.steam import steam_ratings
+
+FILES = ["tests/steam/files/last_light.html", "tests/steam/files/solitairica.html"]
+NUMBER = 50
+
+
+def original_ratings(html_text):
+    def rating(xpath):
+        items = html.fromstring(html_text).xpath(xpath)
+        return items[0] if items else ""
+
+    return {
+        "overall": rating(
+            '//div[contains(@class, "user_reviews")]'
+            '/div[contains(string(), "Overall Reviews")]'
+            '/span[contains(@class, "game_review_summary")]/text()'
+        ),
+        "recent": rating(
+            '//div[contains(@class, "user_reviews_summary_bar")]'
+            '/div[contains(string(), "Recent Reviews")]'
+            '/span[contains(@class, "game_review_summary")]/text()'
+        ),
+    }
+
+
+def main():
+    for path in FILES:
+        with open(path) as fh:
+            html_text = fh.read()
+
+        assert steam_ratings(html_text) == original_ratings(html_text)
+
+        before = timeit.timeit(lambda: original_ratings(html_text), number=NUMBER)
+        after = timeit.timeit(lambda: steam_ratings(html_text), number=NUMBER)
+        print(
+            f"{path}: {before / NUMBER * 1000:.2f}ms -> {after / NUMBER * 1000:.2f}ms "
+            f"({before / after:.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generators for the synthetic data used by the benchmarks: Steam RSS feeds,
+JSON caches, and store pages.
+
+Everything is deterministic so results can be compared between runs.
+"""
+import datetime
+import json
+import random
+import time
+from hashlib import sha224
+from xml.sax.saxutils import escape
+
+# The newest entry in every feed; entries are a minute apart going back from here
+NEWEST = datetime.datetime(2021, 2, 1, tzinfo=datetime.timezone.utc)
+
+STORES = [
+    "https://store.steampowered.com/app/{id}/Game_{id}/",
+    "https://www.epicgames.com/store/en-US/p/game-{id}",
+    "https://www.humblebundle.com/store/game-{id}",
+    "https://www.gog.com/game/game_{id}",
+]
+
+RATINGS = ["Overwhelmingly Positive", "Very Positive", "Mixed", "Mostly Negative"]
+
+SUMMARY = (
+    '<a href="https://steamcommunity.com/linkfilter/?url={store}">{store}</a>'
+    "<br><br>Free to keep for a limited time.<br><br>"
+    "Offer good through {through} 1600 GMT.<br><br>"
+    'Steam store page: <a href="https://store.steampowered.com/app/{id}/Game_{id}/">'
+    "https://store.steampowered.com/app/{id}/Game_{id}/</a><br>"
+)
+
+ITEM = """
+<item>
+    <title>Synthetic game {id} free from {source}</title>
+    <description>{summary}</description>
+    <link>https://steamcommunity.com/groups/freegamesfinders/announcements/detail/{id}</link>
+    <pubDate>{published}</pubDate>
+    <author>nobody@example.com</author>
+    <guid>https://steamcommunity.com/groups/freegamesfinders/announcements/detail/{id}</guid>
+</item>"""
+
+
+def pubdate(index: int) -> str:
+    return (NEWEST - datetime.timedelta(minutes=index)).strftime(
+        "%a, %d %b %Y %H:%M:%S +0000"
+    )
+
+
+def make_entry(index: int) -> str:
+    app_id = 100000 + index
+    store = STORES[index % len(STORES)].format(id=app_id)
+    through = (NEWEST + datetime.timedelta(days=index % 14)).strftime("%B %d,")
+    summary = SUMMARY.format(store=store, through=through, id=app_id)
+    return ITEM.format(
+        id=app_id,
+        source=store.split("/")[2],
+        summary=escape(summary),
+        published=pubdate(index),
+    )
+
+
+def make_feed(count: int) -> bytes:
+    """Return an RSS feed with `count` entries, newest first."""
+    entries = "".join(make_entry(index) for index in range(count))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0"><channel><title>Free Games</title>'
+        "<link>https://steamcommunity.com/groups/freegamesfinders</link>"
+        f"{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_cache(count: int, age_days: int = 30, now: float = None) -> dict:
+    """
+    Return the data for a JSON cache with `count` entries.  Half of them were
+    posted more than `age_days` ago.
+    """
+    now = time.time() if now is None else now
+    rng = random.Random(count)
+    data = {}
+
+    for index in range(count):
+        title = f"Synthetic game {index}"
+        days = rng.uniform(0, age_days) if index % 2 else rng.uniform(age_days, 90)
+        key = sha224(f"{title}slackhttps://hooks.example.com/1".encode()).hexdigest()
+        data[key] = {
+            "title": title,
+            "summary": "Free to keep for a limited time.",
+            "steam_link": f"https://steamcommunity.com/announcements/detail/{index}",
+            "game_link": STORES[index % len(STORES)].format(id=index),
+            "posted": now - days * 24 * 60 * 60,
+            "published": pubdate(index),
+        }
+
+    return data
+
+
+def write_cache(path: str, count: int, **kwargs):
+    with open(path, "w") as fh:
+        json.dump(make_cache(count, **kwargs), fh)
+
+
+def make_store_page(index: int, padding: int = 2000) -> str:
+    """
+    Return a store page with the review summaries near the bottom, like the
+    real ones.  `padding` is the number of filler blocks around them.
+    """
+    recent = RATINGS[index % len(RATINGS)]
+    overall = RATINGS[(index + 1) % len(RATINGS)]
+    filler = "".join(
+        f'<div class="block"><p>Filler paragraph {n} for app {index}.</p></div>'
+        for n in range(padding)
+    )
+    return (
+        "<html><head><title>Synthetic store page</title></head><body>"
+        f"{filler}"
+        '<div class="user_reviews">'
+        '<div class="user_reviews_summary_bar">'
+        f'<div>Recent Reviews: <span class="game_review_summary">{recent}</span></div>'
+        "</div>"
+        '<div class="user_reviews_summary_bar">'
+        f'<div>Overall Reviews: <span class="game_review_summary">{overall}</span>'
+        "</div></div></div>"
+        '<div id="reviews_filter_options"></div>'
+        f"{filler}"
+        "</body></html>"
+    )
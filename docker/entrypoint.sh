@@ -3,6 +3,7 @@ set -euo pipefail
 IFS=$'\n\t'
 
 CRON=0
+DAEMON=0
 CRON_SCHEDULE='0 */2 * * *'
 DEBUG=0
 DRY_RUN=0
@@ -22,6 +23,7 @@ This script is used as a quick debug entrypoint to test some functionality of
 the image.
 Available Flags:
     -c|--cron        Run 'cron -f' instead of the application
+    -D|--daemon      Keep the application running and use its own scheduler
     -s|--sched       Cron schedule (e.g. '0 */2 * * *')
     -d|--debug       Run the application in debug mode (more output)
     --dry-run        Don't send the notifications
@@ -41,6 +43,10 @@ function process_args() {
                 CRON=1
                 shift
                 ;;
+            -D|--daemon)
+                DAEMON=1
+                shift
+                ;;
             -s|--sched)
                 CRON_SCHEDULE=$2
                 shift 2
@@ -63,6 +69,10 @@ function process_args() {
     if [[ $DRY_RUN -eq 1 ]]; then
         APP_ARGS=("${APP_ARGS[@]}" "--dry-run")
     fi
+
+    if [[ $DAEMON -eq 1 ]]; then
+        APP_ARGS=("${APP_ARGS[@]}" "--daemon" "--schedule" "${CRON_SCHEDULE}")
+    fi
 }
 
 function array_join() {
@@ -88,7 +98,9 @@ function run_cron() {
 
 function run_app() {
     log "$(printf "Running: %s %s" "python -m free_game_notifier.app" "$( array_join APP_ARGS )")"
-    python -m free_game_notifier.app "${APP_ARGS[@]/#/}"
+
+    # `exec` so the application gets the signals from tini directly
+    exec python -m free_game_notifier.app "${APP_ARGS[@]/#/}"
 }
 
 function main() {
@@ -3,9 +3,17 @@
 This module is used to scrape the current free game from Epic Games and send a
 notification.
 """
-from importlib.metadata import version
 
-try:
-    __version__ = version(__name__)
-except Exception:
-    pass
+
+def __getattr__(name):
+    # importlib.metadata is slow to import, so only look up the version when
+    # it's asked for.
+    if name == "__version__":
+        from importlib.metadata import version
+
+        try:
+            return version(__name__)
+        except Exception:
+            pass
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
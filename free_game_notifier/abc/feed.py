@@ -9,6 +9,22 @@ from abc import ABC, abstractmethod
 
 class Feed(ABC):
     url: str
+    not_modified: bool = False
+
+    @classmethod
+    @abstractmethod
+    def fetch(cls, url=None):
+        ...
+
+    @classmethod
+    @abstractmethod
+    def parse_options(cls, count=None):
+        ...
+
+    @classmethod
+    @abstractmethod
+    def parse(cls, data, **options):
+        ...
 
     @abstractmethod
     def read(self, url):
@@ -18,6 +34,20 @@ class Feed(ABC):
     def get(self, index=0):
         ...
 
+    @abstractmethod
+    def get_entries(self, count=1):
+        ...
+
+    @abstractmethod
+    def build_item(self, element, filtered=True):
+        ...
+
     @abstractmethod
     def get_items(self, count=1, filtered=True):
         ...
+
+    def prefetch(self, items, workers=1):
+        """
+        Download anything the items need for rendering before they're sent.
+        Nothing is prefetched by default.
+        """
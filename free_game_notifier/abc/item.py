@@ -4,18 +4,18 @@
 A base class to provide a default interface for an Item.
 """
 
+import datetime
 from abc import ABC, abstractmethod, abstractstaticmethod
 
-from pendulum import DateTime
-
 
 class Item(ABC):
-    good_through_datetime: DateTime
+    feed_type: str
+    good_through_datetime: datetime.datetime
     good_through: str
     offer_link: str
     origin_link: str
     posted: str
-    published_datetime: DateTime
+    published_datetime: datetime.datetime
     summary: str
     title: str
 
@@ -31,7 +31,10 @@ class Item(ABC):
     @staticmethod
     @abstractstaticmethod
     def from_dict(data):
-        ...
+        """
+        Build an item from `to_dict()`, or from `cache.get()`, which only
+        returns the fields in `cache.ITEM_FIELDS` (and `posted`).
+        """
 
     @abstractmethod
     def to_dict(self):
@@ -6,15 +6,51 @@ A base class to provide a default interface for a Notifier.
 import logging
 
 from ..abc.item import Item
+from ..config import configuration
+from ..render import payloads
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Notifier:
     location: str
+    notifier_type: str = None
+
+    # Set to `True` by notifiers that implement `send_batch()`
+    supports_batch: bool = False
 
     def __init__(self, url):
         self.url = url
 
+    @classmethod
+    def get_options(cls) -> dict:
+        """Return the `notifier_options` for this type of notifier."""
+        return (
+            configuration.by_path(
+                f"notifier_options.{cls.notifier_type}", raise_on_keyerror=False
+            )
+            or {}
+        )
+
+    def batch_enabled(self) -> bool:
+        return self.supports_batch and bool(self.get_options().get("batch"))
+
+    def render(self, item: Item):
+        """
+        Return the payload sent for `item`.  It's only rendered once per run
+        for each type of notifier.
+        """
+        return payloads.get(
+            item, self.notifier_type, lambda: item.format_message(self)
+        )
+
+    def deliver(self, payload) -> bool:
+        """Send a rendered payload.  Returns `True` if it was sent."""
+        LOGGER.debug("Would be sending: %r", payload)
+
     def send(self, item: Item):
         LOGGER.debug("Would be sending item: %r", item)
+
+    def send_batch(self, items: list[Item]) -> list[Item]:
+        """Send several items at once.  Returns the items that were sent."""
+        raise NotImplementedError
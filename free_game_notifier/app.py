@@ -1,72 +1,445 @@
 #!/usr/bin/env python3
 
 import logging
-
-import typer
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .cache import cache
+from .concurrency import HostLimiter
 from .config import configuration
 from .feed import feed_factory
-from .logger import set_root_level
+from .feed.state import (
+    advance_watermark,
+    feed_state,
+    forget_validators,
+    get_watermark,
+    is_past_watermark,
+    ratings_cache,
+)
+from .http_client import http_client
+from .icons import icon_cache
+from .ignore import get_ignore_rules
+from .logger import LazyPformat, configure_logging, set_root_level
 from .notifier import notifier_factory
+from .outbox import DEAD, PENDING, outbox
+from .ratelimit import rate_limiter
+from .render import payloads, renderers
+from .scheduler import CronSchedule, Scheduler
+from .store import state_path
+from .tracing import tracer
 
 LOGGER = logging.getLogger(__name__)
 
+# The number of entries read from each feed
+FEED_ENTRY_COUNT = 10
 
-def process_notifier(cache_key, notifier, item):
-    sent = False
 
+def deliver_payload(cache_key, notifier, payload) -> bool:
+    """
+    Deliver a rendered payload that's already in the outbox.  Errors are
+    logged and reported as unsent, and the outbox schedules the next attempt.
+    """
+    error = None
     try:
-        sent = notifier.send(item)
-    except Exception:
+        with tracer.span("notifier.send"):
+            sent = bool(notifier.deliver(payload))
+    except Exception as e:
         LOGGER.error("Failed to send", exc_info=True)
+        sent, error = False, e
 
     if sent:
-        cache.add(cache_key, item.to_dict())
-        cache.save()
+        outbox.delivered(cache_key)
+    elif not configuration.get("dry-run"):
+        outbox.failed(cache_key, error)
+
+    return sent
+
+
+def send_notification(cache_key, notifier, item) -> bool:
+    """
+    Render a single notification, add it to the outbox, and deliver it.  Errors
+    are logged and reported as unsent.
+    """
+    try:
+        payload = notifier.render(item)
+    except Exception:
+        LOGGER.error("Failed to render", exc_info=True)
+        return False
+
+    if not configuration.get("dry-run"):
+        outbox.add(
+            cache_key, notifier.notifier_type, notifier.url, payload, item.to_dict()
+        )
+
+    if sent := deliver_payload(cache_key, notifier, payload):
+        item.posted = time.time()
+
+    return sent
+
+
+def record_notification(cache_key, item):
+    cache.add(cache_key, item.to_dict())
+    cache.save()
+
+
+def drain_outbox() -> int:
+    """
+    Retry the deliveries in the outbox that are due.  Returns the number that
+    were delivered.
+    """
+    delivered = 0
+    targets = set(get_targets())
+    for cache_key, entry in outbox.due():
+        if (entry["notifier"], entry["url"]) not in targets:
+            LOGGER.debug(
+                "Not retrying %s; %s is no longer configured",
+                entry["item"].get("title"),
+                entry["notifier"],
+            )
+            continue
+
+        if not (notifier_class := notifier_factory[entry["notifier"]]):
+            LOGGER.warning("Unknown notifier in the outbox: %s", entry["notifier"])
+            continue
 
+        notifier = notifier_class(url=entry["url"])
+        if deliver_payload(cache_key, notifier, entry["payload"]):
+            cache.add(cache_key, dict(entry["item"], posted=time.time()))
+            cache.save()
+            delivered += 1
 
-def process_all_notifiers(item):
+    return delivered
+
+
+def process_notifier(cache_key, notifier, item) -> bool:
+    if sent := send_notification(cache_key, notifier, item):
+        record_notification(cache_key, item)
+
+    return sent
+
+
+def get_targets():
+    """
+    Return the `(notifier_name, notifier_url)` of every configured notifier
+    target.
+    """
     # Compare the registered notifiers to the config.  Ignore any notifiers
     # that aren't in both locations.
     notifier_factory_names = set(notifier_factory.keys())
     notifier_config_names = set(configuration["notifiers"].keys())
     notifier_names = notifier_factory_names & notifier_config_names
 
+    result = []
     for notifier_name in notifier_names:
         # default to at least [None] so the notifier will dump to the log file
         notifier_urls = configuration["notifiers"][notifier_name] or [None]
+        result.extend((notifier_name, notifier_url) for notifier_url in notifier_urls)
 
-        for notifier_url in notifier_urls:
-            # Make the cache key specific to this particular item, which needs
-            # to include the URL.  This way each "notifier/url/item" combo gets
-            # its own cached value.
-            cache_key = cache.get_key(item.title, notifier_name, notifier_url)
+    return result
 
-            if cache_key in cache:
-                LOGGER.debug("...%s already sent to %s", item.title, notifier_url)
-                continue
 
+def get_pending_targets(title, targets, seen=None):
+    """
+    Return the `(cache_key, notifier_name, notifier_url)` of every target that
+    `title` hasn't been sent to yet.  Keys in `seen` are skipped, and the new
+    ones are added to it.
+    """
+    seen = set() if seen is None else seen
+    result = []
+
+    for notifier_name, notifier_url in targets:
+        # Make the cache key specific to this particular item, which needs to
+        # include the URL.  This way each "notifier/url/item" combo gets its own
+        # cached value.
+        cache_key = cache.get_key(title, notifier_name, notifier_url)
+
+        if (cache_key in cache) or (cache_key in seen):
+            LOGGER.debug("...%s already sent to %s", title, notifier_url)
+            tracer.count("cache.notifications.hit")
+            continue
+
+        tracer.count("cache.notifications.miss")
+
+        # Dead entries count too, so they aren't retried until they're pruned
+        if cache_key in outbox:
+            LOGGER.debug("...%s is in the outbox for %s", title, notifier_url)
+            continue
+
+        seen.add(cache_key)
+        result.append((cache_key, notifier_name, notifier_url))
+
+    return result
+
+
+def get_notifications(items):
+    """
+    Build the list of `(cache_key, notifier, item)` that still need to be sent.
+
+    Each cache key is only returned once, even when an item or notifier URL
+    shows up more than once.
+    """
+    targets = get_targets()
+    result = []
+    seen = set()
+
+    for item in items:
+        for cache_key, notifier_name, notifier_url in get_pending_targets(
+            item.title, targets, seen
+        ):
             notifier_class = notifier_factory[notifier_name]
             notifier = notifier_class(url=notifier_url)
+            result.append((cache_key, notifier, item))
+
+    return result
+
+
+def plan_feed(feed, count=10, watermark=None):
+    """
+    Work out which of the newest `count` feed entries still need to be sent
+    somewhere, using only the cheap RSS fields.  Entries that aren't past the
+    feed's `watermark` are skipped.
+
+    Returns a list of `(element, pending_targets)` for those entries.
+    """
+    targets = get_targets()
+    entries = [
+        element
+        for element in feed.get_entries(count=count)
+        if is_past_watermark(element, watermark)
+    ]
+    seen = set()
+
+    plan = []
+    for element in entries:
+        if pending := get_pending_targets(element["title"], targets, seen):
+            plan.append((element, pending))
+
+    pending_count = sum(len(pending) for _, pending in plan)
+    log = LOGGER.info if configuration.get("dry-run") else LOGGER.debug
+    log(
+        "Plan for %s: %d entries x %d targets; %d entries have %d undelivered "
+        "notifications (%d already delivered)",
+        feed.url,
+        len(entries),
+        len(targets),
+        len(plan),
+        pending_count,
+        len(entries) * len(targets) - pending_count,
+    )
+    for element, pending in plan:
+        log("...%s: %d targets", element["title"], len(pending))
+
+    return plan
+
+
+def send_all_notifications(notifications, workers, per_host):
+    """
+    Send the notifications using a pool of `workers` threads, with no more than
+    `per_host` notifications going to a single host at once.
+
+    The cache is only updated from this thread, as each send finishes.  Returns
+    `True` if every notification was sent.
+    """
+    limiter = HostLimiter(per_host)
+
+    def send(cache_key, notifier, item):
+        with limiter(notifier.url):
+            return send_notification(cache_key, notifier, item)
+
+    with ThreadPoolExecutor(max_workers=workers) as senders:
+        futures = {
+            senders.submit(send, cache_key, notifier, item): (cache_key, item)
+            for cache_key, notifier, item in notifications
+        }
+
+        all_sent = True
+        for future in as_completed(futures):
+            if future.result():
+                record_notification(*futures[future])
+            else:
+                all_sent = False
+
+    return all_sent
+
+
+def get_batches(notifications):
+    """
+    Group the notifications for notifiers in batch mode by their target.
+
+    Returns `(batches, notifications)`, where each batch is a list of
+    `(cache_key, notifier, item)` for a single target, and `notifications`
+    holds the ones that are sent one at a time.
+    """
+    batches = {}
+    single = []
+
+    for cache_key, notifier, item in notifications:
+        if notifier.batch_enabled():
+            key = (notifier.notifier_type, notifier.url)
+            batches.setdefault(key, []).append((cache_key, notifier, item))
+        else:
+            single.append((cache_key, notifier, item))
+
+    return list(batches.values()), single
+
+
+def process_batch(batch) -> bool:
+    """
+    Send a batch of items to a single target.  Each item is only cached once
+    the message holding it has been sent.  Returns `True` if every item was
+    sent.
+    """
+    notifier = batch[0][1]
+    try:
+        with tracer.span("notifier.send_batch"):
+            sent = notifier.send_batch([item for _, _, item in batch])
+    except Exception:
+        LOGGER.error("Failed to send batch", exc_info=True)
+        sent = []
+
+    sent_items = {id(item) for item in sent}
+    for cache_key, _, item in batch:
+        if id(item) in sent_items:
+            record_notification(cache_key, item)
+        elif not configuration.get("dry-run"):
+            # Retry the items that weren't sent one at a time from the outbox
+            try:
+                payload = notifier.render(item)
+            except Exception:
+                LOGGER.error("Failed to render", exc_info=True)
+                continue
+
+            outbox.add(
+                cache_key, notifier.notifier_type, notifier.url, payload, item.to_dict()
+            )
+            outbox.failed(cache_key)
+
+    return len(sent_items) == len(batch)
+
+
+def process_all_notifiers(items) -> bool:
+    """Send every item to every notifier.  Returns `True` if nothing failed."""
+    batches, notifications = get_batches(get_notifications(items))
+    workers = get_worker_count("notifiers")
+
+    results = [process_batch(batch) for batch in batches]
+
+    if workers == 1 or len(notifications) < 2:
+        results.extend(
             process_notifier(cache_key, notifier, item)
+            for cache_key, notifier, item in notifications
+        )
+        return all(results)
+
+    LOGGER.debug(
+        "Sending %d notifications with %d workers", len(notifications), workers
+    )
+    per_host = get_worker_count("per_host")
+    return send_all_notifications(notifications, workers, per_host) and all(results)
+
+
+def get_worker_count(name: str) -> int:
+    """Return the configured number of workers for a stage (at least 1)."""
+    workers = configuration.by_path(f"workers.{name}", raise_on_keyerror=False)
+    return max(int(workers or 1), 1)
+
 
+@tracer.traced("process_feed")
+def process_feed(name, feed_class, url, parsed=None):
+    """
+    Process a single feed.
 
-def process_feed(name, feed_class, url):
-    """Process a single feed."""
+    `parsed` is an optional future holding the already-parsed feed and the
+    time it took to parse (see `parse_feed()`).  Any error raised while
+    fetching or parsing it is handled here, the same as if the feed had been
+    read in-line.
+    """
     try:
-        feed = feed_class(url=url)
-        items = feed.get_items(count=10)
+        if parsed is None:
+            feed = feed_class(url=url, count=FEED_ENTRY_COUNT)
+        else:
+            result, seconds = parsed.result()
+            tracer.record("feed.parse", seconds)
+            feed = feed_class(url=url, parsed=result)
+
+        if feed.not_modified:
+            LOGGER.debug("Skipping %s; it has not been modified", feed.url)
+            return
+
+        # Only build full items for the new entries that still need to be sent.
+        watermark = None if configuration.get("rescan") else get_watermark(feed.url)
+        plan = plan_feed(feed, count=FEED_ENTRY_COUNT, watermark=watermark)
+        items = [item for element, _ in plan if (item := feed.build_item(element))]
+
+        if items and configuration.get("prefetch"):
+            feed.prefetch(items, workers=get_worker_count("per_host"))
     except Exception:
         LOGGER.error("Could not parse %s", url, exc_info=True)
+        forget_validators(url or feed_class.url)
         return
 
     if not items:
-        LOGGER.warning("No items found in %s", url)
+        LOGGER.debug("Nothing to send from %s", feed.url)
+    elif not process_all_notifiers(items):
+        # Make sure we read the whole feed again next time so the failed
+        # notifications get retried.
+        forget_validators(feed.url)
         return
 
-    for item in items:
-        process_all_notifiers(item)
+    advance_watermark(feed.url, feed.get_entries(count=FEED_ENTRY_COUNT))
+
+
+def parse_feed(feed_class, data, **options):
+    """
+    Parse a feed in a worker process.  Returns the result along with the time
+    it took, since the tracer only runs in the main process.
+    """
+    start = time.perf_counter()
+    result = feed_class.parse(data, **options)
+    return result, time.perf_counter() - start
+
+
+def fetch_and_parse_feeds(feeds, workers):
+    """
+    Fetch every feed using a thread pool and parse them using a process pool.
+
+    Yields `(name, feed_class, url, future)` in the same order as `feeds` so
+    the notifications go out in a predictable order.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Use "spawn" since the fetch threads are already running when the parse
+    # processes get started.
+    context = multiprocessing.get_context("spawn")
+
+    with ThreadPoolExecutor(max_workers=workers) as fetchers, ProcessPoolExecutor(
+        max_workers=workers, mp_context=context
+    ) as parsers:
+        fetched = {
+            fetchers.submit(feed_class.fetch, url): feed_class
+            for _, feed_class, url in feeds
+        }
+
+        # Start parsing each feed as soon as it has been downloaded.
+        parsed = {}
+        for future in as_completed(fetched):
+            try:
+                feed_class = fetched[future]
+                parsed[future] = parsers.submit(
+                    parse_feed,
+                    feed_class,
+                    future.result(),
+                    **feed_class.parse_options(count=FEED_ENTRY_COUNT),
+                )
+            except Exception:
+                # Hand the fetch error to `process_feed()` so it gets logged
+                # along with everything else for this feed.
+                parsed[future] = future
+
+        for (name, feed_class, url), future in zip(feeds, fetched):
+            yield name, feed_class, url, parsed[future]
 
 
 def process_all_feeds():
@@ -79,37 +452,183 @@ def process_all_feeds():
 
     feed_names = feed_factory_names & feed_config_names
 
-    for name in feed_names:
-        feed_class = feed_factory[name]
-        for url in configuration["feeds"][name]:
+    feeds = [
+        (name, feed_factory[name], url)
+        for name in feed_names
+        for url in configuration["feeds"][name]
+    ]
+
+    workers = get_worker_count("feeds")
+    if workers == 1 or len(feeds) < 2:
+        for name, feed_class, url in feeds:
             process_feed(name, feed_class, url)
+        return
+
+    LOGGER.debug("Reading %d feeds with %d workers", len(feeds), workers)
+    for name, feed_class, url, parsed in fetch_and_parse_feeds(feeds, workers):
+        process_feed(name, feed_class, url, parsed=parsed)
+
+
+def run_once():
+    """Run a single pass over every feed."""
+    http_client.reset_stats()
+    rate_limiter.reset_stats()
+    tracer.reset()
+    payloads.clear()
+    cache.invalidate()
+    outbox.prune(cache.age)
+
+    # Write everything we've sent to the cache in one go at the end of the run.
+    # The outbox is saved even when something fails so the attempts and
+    # backoff aren't lost.
+    try:
+        with cache.batch():
+            if delivered := drain_outbox():
+                LOGGER.info("Delivered %d notifications from the outbox", delivered)
+
+            process_all_feeds()
+    finally:
+        outbox.save()
+
+    payloads.clear()
+    feed_state.save()
+    ratings_cache.wait()
+    ratings_cache.save()
+    icon_cache.save()
+
+    http_client.log_stats()
+    rate_limiter.log_stats()
+    if (counts := outbox.counts())[PENDING] or counts[DEAD]:
+        LOGGER.info(
+            "Outbox: %d notifications waiting to be retried, %d dead",
+            counts[PENDING],
+            counts[DEAD],
+        )
+    get_ignore_rules().log_stats()
+
+    if report := tracer.write_report(
+        http=http_client.stats(), rate_limits=rate_limiter.report(), outbox=counts
+    ):
+        LOGGER.info(
+            "Run took %.3fs: %s",
+            report["duration"],
+            ", ".join(
+                f"{stage} {stats['total']:.3f}s"
+                for stage, stats in report["stages"].items()
+            ),
+        )
+
+
+def run_daemon():
+    """
+    Keep running `run_once()` on the configured schedule until we get a SIGTERM
+    (or SIGINT).  The configuration, cache, and HTTP connections are reused
+    for every run.
+    """
+    scheduler = Scheduler(
+        CronSchedule(configuration.by_path("daemon.schedule")),
+        jitter=configuration.by_path("daemon.jitter", raise_on_keyerror=False),
+    )
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+
+    LOGGER.info("Running with schedule: %s", scheduler.schedule.expression)
+    scheduler.run(run_once)
 
 
 def main(
-    config_path: str = typer.Option(..., envvar="SFN_APP_CONFIG_PATH"),
-    debug: bool = typer.Option(False, envvar="SFN_APP_DEBUG"),
-    dry_run: bool = typer.Option(False),
+    config_path: str,
+    debug: bool = False,
+    dry_run: bool = False,
+    workers: int = 0,
+    daemon: bool = False,
+    schedule: str = None,
+    rescan: bool = False,
 ):
     configuration.load_config(config_path)
 
     if debug:
         configuration["debug"] = True
 
+    if workers:
+        configuration.setdefault("workers", {})["feeds"] = workers
+
+    if schedule:
+        configuration.setdefault("daemon", {})["schedule"] = schedule
+
     if configuration["debug"]:
         set_root_level(logging.DEBUG)
 
+    log_options = configuration.get("logging") or {}
+    configure_logging(
+        log_format=log_options.get("format") or "text",
+        queue=log_options.get("queue", True),
+    )
+
     configuration["dry-run"] = dry_run
+    configuration["rescan"] = rescan
 
     LOGGER.debug("Loaded configuration from %s", config_path)
-    LOGGER.debug(configuration.__dict__)
-    cache.configure(path=configuration["cache_path"], age=configuration["cache_age"])
-    cache.invalidate()
-
-    process_all_feeds()
+    LOGGER.debug("%s", LazyPformat(configuration.__dict__))
+    http_client.configure(**configuration.get("http") or {})
+    cache.configure(
+        path=configuration["cache_path"],
+        age=configuration["cache_age"],
+        backend=configuration.get("cache_backend") or "json",
+        db_path=configuration.get("cache_db_path"),
+    )
+    feed_state.configure(path=state_path("feed_state.json"))
+    outbox.configure(
+        path=state_path("outbox.json"), **configuration.get("outbox") or {}
+    )
+    ratings_cache.configure(
+        path=state_path("ratings_cache.json"),
+        **configuration.get("ratings_cache") or {},
+    )
+    icon_cache.configure(
+        path=state_path("icon_cache.json"), **configuration.get("icon_cache") or {}
+    )
+
+    tracing = configuration.get("tracing") or {}
+    tracer.configure(
+        enabled=tracing.get("enabled"),
+        report_path=tracing.get("report_path") or state_path("run_report.json"),
+        prometheus_path=tracing.get("prometheus_path"),
+    )
+
+    if configuration.get("template_bytecode_cache"):
+        renderers.configure(bytecode_cache_dir=state_path("template_cache"))
+
+    if daemon:
+        run_daemon()
+    else:
+        run_once()
 
 
 def run():
-    typer.run(main)
+    # typer (and everything it pulls in) is only needed for the command line
+    import typer
+
+    def cli(
+        config_path: str = typer.Option(..., envvar="SFN_APP_CONFIG_PATH"),
+        debug: bool = typer.Option(False, envvar="SFN_APP_DEBUG"),
+        dry_run: bool = typer.Option(False),
+        workers: int = typer.Option(0, envvar="SFN_APP_WORKERS"),
+        daemon: bool = typer.Option(False, envvar="SFN_APP_DAEMON"),
+        schedule: str = typer.Option(None, envvar="SFN_APP_SCHEDULE"),
+        rescan: bool = typer.Option(False, envvar="SFN_APP_RESCAN"),
+    ):
+        main(
+            config_path,
+            debug=debug,
+            dry_run=dry_run,
+            workers=workers,
+            daemon=daemon,
+            schedule=schedule,
+            rescan=rescan,
+        )
+
+    typer.run(cli)
 
 
 if __name__ == "__main__":
@@ -2,21 +2,270 @@
 """
 This module contains the cache for the application.
 
-The cache is a simple JSON file stored in the `data_dir` folder.
+The cache is stored using one of these backends:
+
+*   `json` (the default): a simple JSON file that is rewritten on every save.
+*   `sqlite`: a SQLite database in WAL mode.  Only the changed entries are
+    written on save.  The first time it's used, the existing JSON cache file (if
+    any) is imported into the database.
+
+Both backends store each item once, with only the fields listed in
+`ITEM_FIELDS`, and a small delivery record (the item's ID and when it was
+posted) for each notifier target it was sent to.  Caches written in the old
+layout, with a full copy of the item for every delivery, are converted when
+they're loaded.
 """
 import json
 import logging
 import os
+import sqlite3
+import time
+from contextlib import contextmanager
 from hashlib import sha224
-from typing import Optional
-
-import pendulum
+from typing import Iterable, Optional
 
 from .config import configuration
-
+from .tracing import tracer
 
 LOGGER = logging.getLogger(__name__)
 
+# The version of the JSON layout, and the fields stored for each item
+CACHE_VERSION = 2
+ITEM_FIELDS = ("title", "steam_link", "game_link", "published")
+
+
+def get_item_id(d: dict) -> str:
+    return sha224(str(d.get("title")).encode("utf-8")).hexdigest()[:16]
+
+
+def split_entry(d: dict) -> tuple[str, dict, float]:
+    """Split a cache entry into its `(item_id, item, posted)`."""
+    return get_item_id(d), {name: d.get(name) for name in ITEM_FIELDS}, d.get("posted")
+
+
+class JsonBackend:
+    """Keeps the whole cache in memory and rewrites the JSON file on save."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.items, self.deliveries = self.load(path)
+
+    def __contains__(self, key):
+        return key in self.deliveries
+
+    def __len__(self):
+        return len(self.deliveries)
+
+    def get(self, key):
+        if delivery := self.deliveries.get(key):
+            return dict(
+                self.items.get(delivery["item"]) or {}, posted=delivery["posted"]
+            )
+
+        return None
+
+    def add(self, key: str, d: dict):
+        item_id, item, posted = split_entry(d)
+        self.items[item_id] = item
+        self.deliveries[key] = {"item": item_id, "posted": posted}
+
+    def remove(self, keys: Iterable[str]):
+        for key in keys:
+            self.deliveries.pop(key, None)
+
+        # Forget the items that aren't referenced anymore
+        referenced = {delivery["item"] for delivery in self.deliveries.values()}
+        for item_id in set(self.items) - referenced:
+            del self.items[item_id]
+
+    def expired(self, timestamp: float) -> list[tuple[str, str]]:
+        """Return the `(key, title)` of every entry posted before `timestamp`."""
+        return [
+            (key, self.items.get(delivery["item"], {}).get("title"))
+            for key, delivery in self.deliveries.items()
+            if delivery["posted"] and (delivery["posted"] < timestamp)
+        ]
+
+    @staticmethod
+    def normalize(data: dict) -> tuple[dict, dict]:
+        """Return the `(items, deliveries)` from either JSON layout."""
+        if "deliveries" in data:
+            return data.get("items") or {}, data["deliveries"]
+
+        items, deliveries = {}, {}
+        for key, d in data.items():
+            item_id, items[item_id], posted = split_entry(d)
+            deliveries[key] = {"item": item_id, "posted": posted}
+
+        if data:
+            LOGGER.info(
+                "Converting %d cache entries (%d items) to the new cache layout",
+                len(deliveries),
+                len(items),
+            )
+
+        return items, deliveries
+
+    def load(self, path):
+        if path and os.path.exists(path):
+            with open(path) as fh:
+                data = fh.read().strip() or "{}"
+
+            data = json.loads(data)
+        else:
+            data = {}
+
+        return self.normalize(data)
+
+    def save(self):
+        if self.path:
+            data = {
+                "version": CACHE_VERSION,
+                "items": self.items,
+                "deliveries": self.deliveries,
+            }
+            json_data = json.dumps(data, separators=(",", ":"))
+            with open(self.path, "w") as fh:
+                fh.write(json_data)
+        else:
+            LOGGER.warning("Cache.save() called without specifying a JSON file.")
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    """
+    Stores each item and each delivery as a row in a SQLite database.
+
+    Changes are only committed on `save()`, so a whole run can be written in a
+    single transaction.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS deliveries (
+            key TEXT PRIMARY KEY,
+            item_id TEXT NOT NULL,
+            posted REAL
+        );
+        CREATE INDEX IF NOT EXISTS deliveries_posted ON deliveries (posted);
+        CREATE INDEX IF NOT EXISTS deliveries_item_id ON deliveries (item_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path: Optional[str] = None, json_path: Optional[str] = None):
+        self.path = path or ":memory:"
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        self.upgrade()
+
+        if json_path:
+            self.migrate(json_path)
+
+    def __contains__(self, key):
+        row = self.connection.execute(
+            "SELECT 1 FROM deliveries WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM deliveries").fetchone()[0]
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT items.data, deliveries.posted FROM deliveries "
+            "LEFT JOIN items ON items.id = deliveries.item_id "
+            "WHERE deliveries.key = ?",
+            (key,),
+        ).fetchone()
+        if not row:
+            return None
+
+        return dict(json.loads(row[0] or "{}"), posted=row[1] or "")
+
+    def add(self, key: str, d: dict):
+        item_id, item, posted = split_entry(d)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO items (id, title, data) VALUES (?, ?, ?)",
+            (item_id, item["title"], json.dumps(item)),
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO deliveries (key, item_id, posted) VALUES (?, ?, ?)",
+            (key, item_id, posted or None),
+        )
+
+    def remove(self, keys: Iterable[str]):
+        self.connection.executemany(
+            "DELETE FROM deliveries WHERE key = ?", ((key,) for key in keys)
+        )
+        self.connection.execute(
+            "DELETE FROM items WHERE id NOT IN (SELECT item_id FROM deliveries)"
+        )
+
+    def expired(self, timestamp: float) -> list[tuple[str, str]]:
+        """Return the `(key, title)` of every entry posted before `timestamp`."""
+        return self.connection.execute(
+            "SELECT deliveries.key, items.title FROM deliveries "
+            "LEFT JOIN items ON items.id = deliveries.item_id "
+            "WHERE deliveries.posted < ?",
+            (timestamp,),
+        ).fetchall()
+
+    def upgrade(self):
+        """Move the rows of the old `cache` table to the new tables."""
+        if not self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache'"
+        ).fetchone():
+            return
+
+        rows = self.connection.execute("SELECT key, data FROM cache").fetchall()
+        with self.connection:
+            for key, data in rows:
+                self.add(key, json.loads(data))
+
+            self.connection.execute("DROP TABLE cache")
+
+        if rows:
+            LOGGER.info("Converted %d cache entries to the new cache layout", len(rows))
+
+    def migrate(self, json_path: str):
+        """Import the entries from a JSON cache file, but only the first time."""
+        if self.connection.execute(
+            "SELECT 1 FROM meta WHERE name = 'migrated_from'"
+        ).fetchone():
+            return
+
+        backend = JsonBackend(json_path)
+        with self.connection:
+            for key in backend.deliveries:
+                self.add(key, backend.get(key))
+
+            self.connection.execute(
+                "INSERT INTO meta (name, value) VALUES ('migrated_from', ?)",
+                (json_path,),
+            )
+
+        if backend.deliveries:
+            LOGGER.info(
+                "Imported %d cache entries from %s", len(backend.deliveries), json_path
+            )
+
+    def save(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
 
 class Cache:
     __instance = None
@@ -27,52 +276,90 @@ class Cache:
         else:
             LOGGER.warning("Cannot initialize Cache() more than once")
 
-    def configure(self, path: Optional[str] = None, age: int = 90):
+        self.backend = None
+        self._batch_depth = 0
+        self._dirty = False
+
+    def configure(
+        self,
+        path: Optional[str] = None,
+        age: int = 90,
+        backend: str = "json",
+        db_path: Optional[str] = None,
+    ):
         self.path = path
-        self.data = self.load(self.path)
         self.age = age
 
+        if self.backend:
+            self.backend.close()
+
+        if backend == "sqlite":
+            if path and not db_path:
+                db_path = os.path.splitext(path)[0] + ".sqlite3"
+
+            self.backend = SqliteBackend(db_path, json_path=path)
+        elif backend == "json":
+            self.backend = JsonBackend(path)
+        else:
+            raise ValueError(f"Unknown cache backend: '{backend}'")
+
         if self.invalidate():
             self.save()
 
     def __setitem__(self, name, value):
-        self.data[name] = value
+        self.backend.add(name, value)
 
     def __getitem__(self, name):
-        return self.data.get(name)
+        return self.backend.get(name)
 
     def __contains__(self, key):
-        return key in self.data
+        return key in self.backend
 
-    def get(self, title):
-        return self.data.get(title)
+    def __len__(self):
+        return len(self.backend)
+
+    def get(self, key):
+        """
+        Return the cached entry for `key`: the fields in `ITEM_FIELDS` and when
+        it was `posted`.  The `summary` isn't kept.
+        """
+        return self.backend.get(key)
 
     def add(self, key: str, d: dict):
-        self.data[key] = d
+        self.backend.add(key, d)
 
-    def load(self, path):
-        if path and os.path.exists(path):
-            with open(path) as fh:
-                data = fh.read().strip() or "{}"
+    @contextmanager
+    def batch(self):
+        """
+        Defer any calls to `save()` until the end of the block.
 
-            data = json.loads(data)
-        else:
-            data = {}
+        Usage:
 
-        return data
+            >>> with cache.batch():
+            ...     cache.add(key, item.to_dict())
+            ...     cache.save()  # nothing is written yet
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if (self._batch_depth == 0) and self._dirty:
+                self.save()
 
     def save(self):
+        if self._batch_depth:
+            self._dirty = True
+            return
+
+        self._dirty = False
+
         if configuration["dry-run"]:
             LOGGER.debug("not saving cache due to dry-run")
             return
 
-        if self.path:
-            data = self.data or {}
-            json_data = json.dumps(data)
-            with open(self.path, "w") as fh:
-                fh.write(json_data)
-        else:
-            LOGGER.warning("Cache.save() called without specifying a JSON file.")
+        with tracer.span("cache.save"):
+            self.backend.save()
 
     def invalidate(self, days_older_than: int = None):
         """
@@ -83,28 +370,23 @@ class Cache:
         if not days_older_than:
             return
 
-        keys_to_remove = set([])
-        cleanup_date = pendulum.now(tz="UTC").subtract(days=days_older_than)
+        cleanup_timestamp = time.time() - (days_older_than * 24 * 60 * 60)
+        expired = self.backend.expired(cleanup_timestamp)
 
-        for key, item in self.data.items():
-            posted_date = pendulum.from_timestamp(item["posted"])
-            if item["posted"] and (posted_date < cleanup_date):
-                LOGGER.debug("invalidating %s (%s)", key, item["title"])
-                keys_to_remove.add(key)
+        for key, title in expired:
+            LOGGER.debug("invalidating %s (%s)", key, title)
 
-        if keys_to_remove:
+        if expired:
             LOGGER.debug(
                 "Invalidating %d cached entries older than %d days",
-                len(keys_to_remove),
+                len(expired),
                 self.age,
             )
 
-            for key in keys_to_remove:
-                self.data.pop(key)
-
+            self.backend.remove(key for key, _ in expired)
             self.save()
 
-        return len(keys_to_remove)
+        return len(expired)
 
     def get_key(self, *args):
         """
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Helpers for limiting how much work we do at the same time.
+"""
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class HostLimiter:
+    """
+    Limit the number of concurrent operations against any single host.
+
+    Usage:
+
+        >>> limiter = HostLimiter(2)
+        >>> with limiter("https://hooks.slack.com/services/abc"):
+        ...     pass
+    """
+
+    def __init__(self, per_host: int):
+        self.per_host = max(int(per_host or 1), 1)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+
+            return self._semaphores[host]
+
+    @contextmanager
+    def __call__(self, url: str):
+        host = urlparse(url or "").netloc
+        with self._semaphore(host):
+            yield
@@ -36,19 +36,23 @@ either `raise_on_keyerror` when instantiating the object or when calling the
 This method tries to determine if the item being dereferenced is a list.  In that
 case, and the key is an integer, the method will assume you are indexing into
 the sequence and return the specified item.  See the example above.
+
+## deferred loading
+
+The module-level `configuration` doesn't parse anything (or import PyYAML)
+until it's first used, which is normally when `main()` loads the settings file.
 """
 import logging
 import os
 from collections.abc import MutableMapping
 
-import yaml
-
 LOGGER = logging.getLogger(__name__)
 DEFAULT_PATH = os.environ.get("SFN_APP_CONFIG_PATH")
 DEFAULT = """
 ---
 timezone: "UTC"
 cache_age: 30
+cache_backend: json
 start_date: 2020-12-01
 feeds:
     steam:
@@ -56,7 +60,54 @@ feeds:
 notifiers:
     slack:
         -
+notifier_options:
+    slack:
+        batch: false
+        rate: 1
+        burst: 1
+        max_retries: 3
+        max_wait: 30
+        backoff_factor: 1
 debug: false
+logging:
+    format: text
+    queue: true
+state_dir:
+feed_max_bytes: 10485760
+feed_parser: stream
+prefetch: false
+http:
+    connect_timeout: 5
+    read_timeout: 30
+    retries: 3
+    backoff_factor: 0.5
+    backoff_max: 10
+    pool_size: 10
+template_bytecode_cache: true
+icon_cache:
+    ttl: 604800
+    negative_ttl: 86400
+    max_entries: 1000
+ratings_cache:
+    ttl: 86400
+    stale_ttl: 604800
+    negative_ttl: 3600
+    max_entries: 5000
+outbox:
+    max_attempts: 5
+    backoff: 300
+    backoff_max: 86400
+daemon:
+    schedule: "0 */2 * * *"
+    jitter: 0
+tracing:
+    enabled: false
+    report_path:
+    prometheus_path:
+workers:
+    feeds: 1
+    notifiers: 1
+    per_host: 4
 icons:
     steam: https://store.steampowered.com/favicon.ico
     epic: https://www.epicgames.com/favicon.ico
@@ -71,13 +122,27 @@ class Configuration(MutableMapping):
 
     def __init__(self, config=None, raise_on_keyerror: bool = True):
         if Configuration.__instance is None:
-            self._config = yaml.safe_load(DEFAULT)
+            # Incremented every time the configuration changes so anything
+            # derived from it (e.g. compiled patterns) knows to rebuild.
+            self.version = 0
             self.raise_on_keyerror = bool(raise_on_keyerror)
-            self.load_config(config or DEFAULT_PATH or DEFAULT)
+            self._initial = config
+            self.__config = None
             Configuration.__instance = self
         else:
             LOGGER.warning("Configuration.__init__ called again")
 
+    @property
+    def _config(self) -> dict:
+        """The configuration data; the defaults are loaded on first use."""
+        if self.__config is None:
+            import yaml
+
+            self.__config = yaml.safe_load(DEFAULT)
+            self.load_config(self._initial or DEFAULT_PATH or DEFAULT)
+
+        return self.__config
+
     def __getitem__(self, key):
         return self._config.__getitem__(key)
 
@@ -88,12 +153,17 @@ class Configuration(MutableMapping):
         return iter(self._config)
 
     def __setitem__(self, key, value):
+        self.version += 1
         return self._config.__setitem__(key, value)
 
     def __delitem__(self, key):
+        self.version += 1
         return self._config.__delitem__(key)
 
     def load_config(self, config):
+        import yaml
+
+        self.version += 1
         if os.path.isfile(config):
             with open(config) as fh:
                 self._config.update(yaml.safe_load(fh))
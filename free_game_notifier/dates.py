@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast datetime helpers for the hot paths (feed dates, cache timestamps, and log
+records), built on the standard library.
+
+Everything returned here is a timezone-aware `datetime.datetime`, so the values
+can be compared with the pendulum objects used elsewhere.
+"""
+import datetime
+import logging
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+LOGGER = logging.getLogger(__name__)
+
+# The format used by the pubDate element in pendulum's syntax.  This is only
+# used when the standard library can't parse the value.
+RFC822_PENDULUM_FORMAT = "ddd, DD MMM YYYY HH:mm:ss ZZ"
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str = "UTC") -> datetime.tzinfo:
+    """Return the (shared) tzinfo object for a timezone name."""
+    if name.upper() == "UTC":
+        return datetime.timezone.utc
+
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=4096)
+def parse_rfc822(value: str) -> Optional[datetime.datetime]:
+    """
+    Convert an RFC 822 date to a datetime.  E.g.:
+
+        Wed, 30 Dec 2020 16:00:01 +0000
+
+    Results are memoized, since the same entries are parsed on every run.
+    `None` is returned if the value can't be parsed.
+    """
+    if not value:
+        return None
+
+    try:
+        dt = parsedate_to_datetime(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=datetime.timezone.utc)
+
+        return dt
+    except (TypeError, ValueError, IndexError):
+        pass
+
+    try:
+        import pendulum
+
+        return pendulum.from_format(value, RFC822_PENDULUM_FORMAT)
+    except Exception:
+        LOGGER.warning("Could not parse date: %s", value)
+
+    return None
+
+
+def from_timestamp(timestamp: float, tz: str = "UTC") -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, get_timezone(tz))
+
+
+def now(tz: str = "UTC") -> datetime.datetime:
+    return datetime.datetime.now(get_timezone(tz))
+
+
+def start_of_day(date: datetime.date, tz: str = "UTC") -> datetime.datetime:
+    """Return midnight at the start of `date`."""
+    return datetime.datetime.combine(date, datetime.time.min, get_timezone(tz))
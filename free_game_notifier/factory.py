@@ -1,28 +1,87 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+A registry of the feed and notifier classes.
+
+Classes can be registered by their dotted path (`package.module:Class`), in
+which case the module is only imported the first time the class is needed.
+Other packages can add their own classes using an entry point group:
+
+    [tool.poetry.plugins."free_game_notifier.feeds"]
+    epic = "my_package.epic:Feed"
+
+Entry points are only looked up when a name is needed that hasn't been
+registered, or when all of the names are listed.
+"""
+import logging
+from importlib import import_module
+
+LOGGER = logging.getLogger(__name__)
+
+
+def load_path(path: str):
+    """Import the object at `path` (e.g. `package.module:Class`)."""
+    module_name, _, attribute = path.partition(":")
+    obj = import_module(module_name)
+    for part in filter(None, attribute.split(".")):
+        obj = getattr(obj, part)
+
+    return obj
 
 
 class ClassFactory:
-    def __init__(self):
+    def __init__(self, entry_point_group: str = None):
         self.mapping = {}
+        self.entry_point_group = entry_point_group
+        self._discovered = entry_point_group is None
 
     def register(self, key, obj):
+        """Register a class, or the dotted path to import it from."""
         self.mapping[key] = obj
 
+    def discover(self):
+        """Register the classes from our entry point group (only once)."""
+        if self._discovered:
+            return
+
+        self._discovered = True
+
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=self.entry_point_group):
+            # Classes registered in code win over installed plugins
+            if entry_point.name not in self.mapping:
+                LOGGER.debug(
+                    "Found %s plugin: %s", entry_point.group, entry_point.value
+                )
+                self.mapping[entry_point.name] = entry_point.value
+
+    def load(self, key):
+        if key not in self.mapping:
+            self.discover()
+
+        item = self.mapping.get(key)
+        if isinstance(item, str):
+            item = self.mapping[key] = load_path(item)
+
+        return item
+
     def get(self, key):
-        if not (item := self.mapping.get(key)):
+        if not (item := self.load(key)):
             raise ValueError(f"Unknown mapping: '{key}'")
 
         return item
 
     def keys(self):
+        """Return the registered names without importing anything."""
+        self.discover()
         return self.mapping.keys()
 
     def values(self):
-        return self.mapping.values()
+        return [self.load(key) for key in self.keys()]
 
     def items(self):
-        return self.mapping.items()
+        return [(key, self.load(key)) for key in self.keys()]
 
     def __getitem__(self, key):
-        return self.mapping.get(key)
+        return self.load(key)
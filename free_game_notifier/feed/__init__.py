@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from ..factory import ClassFactory
-from .steam import Feed as SteamFeed
 
-feed_factory = ClassFactory()
-feed_factory.register("steam", SteamFeed)
+feed_factory = ClassFactory(entry_point_group="free_game_notifier.feeds")
+feed_factory.register("steam", "free_game_notifier.feed.steam:Feed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A streaming RSS 2.0 parser.
+
+Entries are read one at a time using `lxml.etree.iterparse`, and each `<item>`
+element is thrown away once we're done with it.  Parsing stops as soon as we
+have enough entries, or we reach an entry older than the start date (feeds are
+newest-first).
+
+Each entry is a dictionary with the same keys feedparser uses for the fields
+we need: `title`, `summary`, `link`, `published`, and `id`.  The summary is
+cleaned up by feedparser's own sanitizer, so it's the same as feedparser's (e.g.
+`<br>` becomes `<br />`).
+"""
+import datetime
+import logging
+from typing import Iterator, Optional
+
+from .. import dates
+
+LOGGER = logging.getLogger(__name__)
+
+# feedparser key -> RSS element
+FIELDS = {
+    "title": "title",
+    "summary": "description",
+    "link": "link",
+    "published": "pubDate",
+    "id": "guid",
+}
+
+
+def clean_html(html: str) -> str:
+    """
+    Sanitize `html` the same way feedparser does for a summary.  (feedparser
+    also resolves relative links, but the feeds are passed to it as bytes, so
+    there's no base URL and they're left alone.)
+    """
+    if not html:
+        return html
+
+    from feedparser.sanitizer import _sanitize_html
+
+    return _sanitize_html(html, "utf-8", "text/html").strip()
+
+
+def iter_entries(source) -> Iterator[dict]:
+    """
+    Yield the entries from `source`, which can be a path or any object with a
+    `read()` method (e.g. an open file or `mmap`).
+
+    `lxml.etree.XMLSyntaxError` is raised for malformed documents.
+    """
+    from lxml import etree
+
+    for _, element in etree.iterparse(source, events=("end",), tag="item"):
+        entry = {
+            key: (element.findtext(tag) or "").strip() for key, tag in FIELDS.items()
+        }
+        entry["summary"] = clean_html(entry["summary"])
+        yield entry
+
+        # Free the memory used by this entry and the ones before it
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def parse_entries(
+    source, count: Optional[int] = None, start_date: datetime.datetime = None
+) -> list[dict]:
+    """
+    Return up to `count` entries from `source` published on or after
+    `start_date`.
+    """
+    result = []
+    if count is not None and count < 1:
+        return result
+
+    for entry in iter_entries(source):
+        published = dates.parse_rfc822(entry["published"])
+        if start_date and published and (published < start_date):
+            LOGGER.debug("Item too old: %s %s", entry["title"][:10], entry["published"])
+            break
+
+        result.append(entry)
+        if count and (len(result) >= count):
+            break
+
+    return result
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent state for the feeds.
+
+For each feed URL, we store the `ETag` and `Last-Modified` validators from the
+last response so the next request can be made conditional.  A
+`304 Not Modified` response means we can skip downloading and parsing the feed.
+
+We also store a watermark for each feed URL: the publish date of the newest
+entry we've processed, along with the IDs of the entries published at that
+time.  Entries at or below the watermark are skipped on later runs.
+
+`ratings_cache` holds the review ratings extracted from each store page, keyed
+by the app ID.
+"""
+from typing import Iterable, Optional
+
+from .. import dates
+from ..store import JsonStore, TtlStore
+
+feed_state = JsonStore()
+ratings_cache = TtlStore(name="ratings")
+
+
+def get_validator_headers(url: str) -> dict:
+    """Return the conditional request headers for `url`."""
+    state = feed_state.get(url) or {}
+    headers = {}
+
+    if etag := state.get("etag"):
+        headers["If-None-Match"] = etag
+
+    if last_modified := state.get("last_modified"):
+        headers["If-Modified-Since"] = last_modified
+
+    return headers
+
+
+def set_validators(url: str, response_headers) -> None:
+    """Store the validators found in the response headers for `url`."""
+    state = dict(feed_state.get(url) or {})
+    state["etag"] = response_headers.get("ETag")
+    state["last_modified"] = response_headers.get("Last-Modified")
+    feed_state[url] = state
+
+
+def forget_validators(url: str) -> None:
+    """
+    Forget the validators for `url` so the feed is fully read on the next run.
+
+    This is used when we couldn't process everything in the feed.
+    """
+    if state := feed_state.get(url):
+        state = dict(state)
+        state.pop("etag", None)
+        state.pop("last_modified", None)
+        feed_state[url] = state
+
+
+def get_entry_id(entry) -> str:
+    return entry.get("id") or entry.get("link") or entry["title"]
+
+
+def get_watermark(url: str) -> Optional[dict]:
+    """Return the `{"published": timestamp, "ids": [...]}` watermark for `url`."""
+    return (feed_state.get(url) or {}).get("watermark")
+
+
+def is_past_watermark(entry, watermark: Optional[dict]) -> bool:
+    """
+    Return `True` if `entry` is newer than the watermark.  Entries without a
+    usable publish date are always treated as new.
+    """
+    if not watermark:
+        return True
+
+    if not (published := dates.parse_rfc822(entry.get("published"))):
+        return True
+
+    timestamp = published.timestamp()
+    if timestamp == watermark["published"]:
+        return get_entry_id(entry) not in watermark["ids"]
+
+    return timestamp > watermark["published"]
+
+
+def advance_watermark(url: str, entries: Iterable) -> None:
+    """Move the watermark for `url` up to the newest of `entries`."""
+    watermark = get_watermark(url) or {"published": 0, "ids": []}
+    published, ids = watermark["published"], set(watermark["ids"])
+
+    for entry in entries:
+        if not (entry_published := dates.parse_rfc822(entry.get("published"))):
+            continue
+
+        timestamp = entry_published.timestamp()
+        if timestamp > published:
+            published, ids = timestamp, {get_entry_id(entry)}
+        elif timestamp == published:
+            ids.add(get_entry_id(entry))
+
+    if (published, ids) != (watermark["published"], set(watermark["ids"])):
+        state = dict(feed_state.get(url) or {})
+        state["watermark"] = {"published": published, "ids": sorted(ids)}
+        feed_state[url] = state
@@ -4,21 +4,26 @@
 This module retreives and reads a feed from the Steam freegames community.
 """
 import datetime
+import io
 import logging
+import mmap
 import os
 import re
-
-import feedparser
-import pendulum
-import requests
-from jinja2 import Template
-from lxml import html
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
 
 from ..abc.feed import Feed as BaseFeed
 from ..abc.item import Item as BaseItem
+from .. import dates
 from ..config import configuration
+from ..http_client import http_client, read_limited
 from ..icons import icon_from_url
-from ..notifier.slack import Notifier as SlackNotifier
+from ..ignore import get_ignore_rules
+from ..render import renderers
+from ..tracing import tracer
+from .rss import parse_entries
+from .state import get_validator_headers, ratings_cache, set_validators
 
 LOGGER = logging.getLogger(__name__)
 
@@ -48,7 +53,7 @@ Links:
 """
 
 
-def parse_good_through(summary: str, year:int = pendulum.now().year) -> str:
+def parse_good_through(summary: str, year: int = None) -> str:
     """
     Converts the "Good through" string in the announcement to the local timezone.
 
@@ -60,6 +65,9 @@ def parse_good_through(summary: str, year:int = pendulum.now().year) -> str:
     # the string and add it as a parameter and add the year.
     # IOW, convert "December 21, 1600 GMT" to "December 21, 1600 2020".
     if match := re.search(r"Offer good (through|thru) (?P<date>.*?)\<br", summary):
+        import pendulum
+
+        year = year or pendulum.now().year
         parts = match.group("date").split()
         tz = parts[-1].rstrip(".")
         try:
@@ -73,29 +81,22 @@ def parse_good_through(summary: str, year:int = pendulum.now().year) -> str:
     return "", None
 
 
-def parse_pubdate(pubdate: str) -> pendulum.DateTime:
+def parse_pubdate(pubdate: str) -> datetime.datetime:
     """
-    Converts the pubDate element to a pendulum DateTime.
+    Converts the pubDate element to an aware datetime.
 
     pubDate looks like this:
 
         Wed, 30 Dec 2020 16:00:01 +0000
     """
-    fmt = "ddd, DD MMM YYYY HH:mm:ss ZZ"
-    try:
-        return pendulum.from_format(pubdate, fmt)
-    except Exception:
-        LOGGER.warning("Could not parse pubdate: %s", pubdate)
-
-    return None
+    return dates.parse_rfc822(pubdate)
 
 
-def to_pendulum(date: datetime.date) -> pendulum.DateTime:
+def to_datetime(date: datetime.date) -> datetime.datetime:
     if not date:
         return None
 
-    dt = datetime.datetime.combine(date, datetime.datetime.min.time())
-    return pendulum.instance(dt)
+    return dates.start_of_day(date)
 
 
 def parse_steam_store_link(summary: str) -> str:
@@ -104,54 +105,93 @@ def parse_steam_store_link(summary: str) -> str:
     # href="https://store.steampowered.com/app/314660/Oddworld_New_n_Tasty/"
     if match := re.search(r'href="(https://store.steampowered.*?)"', summary):
         return match.group(1)
-    else:
+    elif summary:
         LOGGER.warning("Could not parse steam store page.  Here's the summary:")
         LOGGER.debug(summary)
 
     return ""
 
 
-def steam_recent_app_rating(html_text):
-    tree = html.fromstring(html_text)
-    items = tree.xpath(
-        '//div[contains(@class, "user_reviews_summary_bar")]'
-        '/div[contains(string(), "Recent Reviews")]'
-        '/span[contains(@class, "game_review_summary")]/text()'
-    )
+RECENT_RATING_XPATH = (
+    '//div[contains(@class, "user_reviews_summary_bar")]'
+    '/div[contains(string(), "Recent Reviews")]'
+    '/span[contains(@class, "game_review_summary")]/text()'
+)
+OVERALL_RATING_XPATH = (
+    '//div[contains(@class, "user_reviews")]'
+    '/div[contains(string(), "Overall Reviews")]'
+    '/span[contains(@class, "game_review_summary")]/text()'
+)
 
-    if items:
-        return items[0]
-    else:
-        LOGGER.debug("Could not parse rating")
+# The review summary bars are near the bottom of the store page, right before
+# the review filters.
+REVIEWS_REGION_START = re.compile(r'<div[^>]*class="[^"]*user_reviews_summary_bar')
+REVIEWS_REGION_END = "reviews_filter_options"
 
-    return ""
 
+def parse_store_page(html_text):
+    """
+    Parse the part of a store page that holds the review summaries.
 
-def steam_all_app_rating(html_text):
-    tree = html.fromstring(html_text)
-    items = tree.xpath(
-        '//div[contains(@class, "user_reviews")]'
-        '/div[contains(string(), "Overall Reviews")]'
-        '/span[contains(@class, "game_review_summary")]/text()'
-    )
+    The store page is hundreds of KB, and we only need a few of those.  If we
+    can't find the reviews section, the whole page is parsed instead.
+    """
+    from lxml import html
 
-    if items:
+    if match := REVIEWS_REGION_START.search(html_text):
+        end = html_text.find(REVIEWS_REGION_END, match.start())
+        region = html_text[match.start() : end if end > 0 else None]
+        return html.fromstring(f"<div>{region}</div>")
+
+    return html.fromstring(html_text)
+
+
+@lru_cache(maxsize=None)
+def compile_xpath(expression: str):
+    from lxml import etree
+
+    return etree.XPath(expression)
+
+
+def _first_rating(xpath, tree):
+    if items := compile_xpath(xpath)(tree):
         return items[0]
-    else:
-        LOGGER.debug("Could not parse rating")
 
+    LOGGER.debug("Could not parse rating")
     return ""
 
 
+def steam_recent_app_rating(html_text, tree=None):
+    tree = parse_store_page(html_text) if tree is None else tree
+    return _first_rating(RECENT_RATING_XPATH, tree)
+
+
+def steam_all_app_rating(html_text, tree=None):
+    tree = parse_store_page(html_text) if tree is None else tree
+    return _first_rating(OVERALL_RATING_XPATH, tree)
+
+
 def steam_ratings(html_text):
     """Tries to get both 'all' and 'recent' ratings."""
+    tree = parse_store_page(html_text)
     return {
-        "overall": steam_all_app_rating(html_text),
-        "recent": steam_recent_app_rating(html_text),
+        "overall": steam_all_app_rating(html_text, tree=tree),
+        "recent": steam_recent_app_rating(html_text, tree=tree),
     }
 
 
+def steam_app_id(url: str) -> str:
+    """Return the app ID from a Steam store URL."""
+    if url and (match := re.search(r"store\.steampowered\.com/app/(\d+)", url)):
+        return match.group(1)
+
+    return ""
+
+
 class Item(BaseItem):
+    feed_type: str = "steam"
+
+    @tracer.traced("item")
     def __init__(
         self,
         title: str,
@@ -171,7 +211,8 @@ class Item(BaseItem):
 
         self.published_datetime = parse_pubdate(published)
         self.steam_store_link = parse_steam_store_link(summary)
-        self.good_through, self.good_through_datetime = parse_good_through(self.summary, year=self.published_datetime.year)
+        year = (self.published_datetime or dates.now()).year
+        self.good_through, self.good_through_datetime = parse_good_through(self.summary, year=year)
 
         # See if we can parse the direct link.
         if (not game_link) and (
@@ -195,9 +236,10 @@ class Item(BaseItem):
 
     @staticmethod
     def from_dict(data):
+        # Cached items don't keep the summary (see `cache.ITEM_FIELDS`)
         return Item(
             title=data["title"],
-            summary=data["summary"],
+            summary=data.get("summary") or "",
             steam_link=data["steam_link"],
             game_link=data["game_link"],
             posted=data.get("posted"),
@@ -214,11 +256,9 @@ class Item(BaseItem):
             "published": self.published,
         }
 
+    @tracer.traced("format_message")
     def format_message(self, notifier):
-        if isinstance(notifier, SlackNotifier):
-            return self.to_slack_message()
-
-        raise NotImplementedError(f"Notifier type {type(notifier)} is not implemented")
+        return renderers.render(self, notifier)
 
     def get_steam_store_html(self):
         html = None
@@ -226,18 +266,38 @@ class Item(BaseItem):
             with open(self.steam_store_link) as fh:
                 html = fh.read()
         elif self.steam_store_link:
-            response = requests.get(self.steam_store_link)
+            response = http_client.get(self.steam_store_link)
             response.raise_for_status()
             html = response.text
 
         return html
 
-    def to_slack_message(self):
-        ratings = None
-        if (html := self.get_steam_store_html()) :
+    def load_steam_ratings(self):
+        """
+        Return the store page ratings, or `None` when the page doesn't have any
+        (so `ratings_cache` only keeps them for its `negative_ttl`).
+        """
+        if html := self.get_steam_store_html():
             ratings = steam_ratings(html)
+            if any(ratings.values()):
+                return ratings
+
+        return None
+
+    def get_steam_ratings(self):
+        """
+        Return the store page ratings, using `ratings_cache` when we know the
+        app ID.
+        """
+        if app_id := steam_app_id(self.steam_store_link):
+            return ratings_cache.get_or_load(app_id, self.load_steam_ratings)
 
-        t = Template(SLACK_BODY_TEMPLATE)
+        return self.load_steam_ratings()
+
+    def to_slack_message(self):
+        ratings = self.get_steam_ratings()
+
+        t = renderers.get_template("steam/slack")
         body = t.render(
             title=self.title,
             ratings=ratings,
@@ -271,26 +331,129 @@ class Item(BaseItem):
         return data
 
 
+renderers.register_template("steam/slack", SLACK_BODY_TEMPLATE)
+renderers.register("steam", "slack", Item.to_slack_message)
+
+
 class Feed(BaseFeed):
     url: str = "https://steamcommunity.com/groups/freegamesfinders/rss/"
 
-    def __init__(self, url=None, webook=None):
+    def __init__(self, url=None, webook=None, parsed=None, count=None):
         self.url = url or Feed.url
         self.webhook = webook
-        self.read(url)
+        self.count = count
+
+        if parsed is None:
+            self.read(url)
+        else:
+            self.load(parsed)
+
+    @classmethod
+    @tracer.traced("feed.fetch")
+    def fetch(cls, url=None) -> bytes:
+        """
+        Retrieve the raw feed document from a local path or a URL.
+
+        This is split from `parse()` so the network I/O and the parsing can be
+        run in different workers.
+
+        Remote feeds are requested with the validators from the last response.
+        `None` is returned if the server tells us the feed hasn't changed.
+        """
+        feed_url = url or cls.url
+        if os.path.isfile(feed_url):
+            with open(feed_url, "rb") as fh:
+                return fh.read()
+
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        headers.update(get_validator_headers(feed_url))
+
+        response = http_client.get(feed_url, headers=headers, stream=True)
+        if response.status_code == 304:
+            response.close()
+            LOGGER.debug("%s has not been modified", feed_url)
+            return None
+
+        response.raise_for_status()
+        data = read_limited(response, configuration.get("feed_max_bytes"))
+        set_validators(feed_url, response.headers)
+
+        return data
+
+    @classmethod
+    def parse_options(cls, count=None) -> dict:
+        """
+        Return the keyword arguments for `parse()` that come from the
+        configuration, so parsing can be done in another process.
+        """
+        return {
+            "count": count,
+            "start_date": to_datetime(configuration.get("start_date")),
+            "parser": configuration.get("feed_parser") or "stream",
+        }
+
+    @classmethod
+    @tracer.traced("feed.parse")
+    def parse(cls, data, count=None, start_date=None, parser="stream") -> dict:
+        """
+        Parse a raw feed document (`bytes` or a memory-mapped file).
 
+        The `stream` parser stops reading once it has `count` entries or finds
+        one older than `start_date`.  Documents it can't parse (e.g. malformed
+        XML) are handed to feedparser, which reads the whole thing.
+
+        Only the entries are returned; the rest of feedparser's result (e.g.
+        `bozo_exception`) can't always be pickled across processes.
+        """
+        if data is None:
+            return {"items": [], "not_modified": True}
+
+        if parser == "stream":
+            from lxml import etree
+
+            try:
+                source = io.BytesIO(data) if isinstance(data, bytes) else data
+                entries = parse_entries(source, count=count, start_date=start_date)
+                return {"items": entries, "filtered": True}
+            except etree.XMLSyntaxError as e:
+                LOGGER.debug("Could not stream the feed (%s); using feedparser", e)
+
+        import feedparser
+
+        result = feedparser.parse(data if isinstance(data, bytes) else data[:])
+        return {"items": result.entries}
+
+    @tracer.traced("feed.read")
     def read(self, url=None):
         feed_url = url or self.url
-        self._feed = feedparser.parse(feed_url)
-        if not self._feed.items:
-            LOGGER.warning("No items found in %s", feed_url)
+        options = self.parse_options(count=self.count)
+
+        if os.path.isfile(feed_url) and os.path.getsize(feed_url):
+            # Memory-map local files so we only read the parts we parse
+            with open(feed_url, "rb") as fh, mmap.mmap(
+                fh.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                self.load(self.parse(data, **options))
+        else:
+            self.load(self.parse(self.fetch(feed_url), **options))
+
+    def load(self, parsed):
+        self._feed = parsed
+        self.not_modified = bool(parsed.get("not_modified"))
+
+        if self.not_modified:
+            return
+        elif not self._feed["items"]:
+            LOGGER.warning("No items found in %s", self.url)
         else:
-            self.filter_pubdate()
-            LOGGER.debug("Found %d items in %s", len(self._feed.entries), feed_url)
+            if not parsed.get("filtered"):
+                self.filter_pubdate()
+
+            LOGGER.debug("Found %d items in %s", len(self._feed["items"]), self.url)
 
     def filter_pubdate(self):
         """Filters out any of our items that were published prior to the setting."""
-        start_date = to_pendulum(configuration.get("start_date"))
+        start_date = to_datetime(configuration.get("start_date"))
 
         if not start_date:
             return
@@ -298,7 +461,7 @@ class Feed(BaseFeed):
         result = []
 
         LOGGER.debug(
-            "filtering all items older than %s", start_date.format("YYYY-MMM-DD")
+            "filtering all items older than %s", start_date.strftime("%Y-%b-%d")
         )
         for item in self._feed["items"]:
             pubdate = parse_pubdate(item["published"])
@@ -308,7 +471,7 @@ class Feed(BaseFeed):
                 LOGGER.debug(
                     "Item too old: %s %s",
                     item["title"][:10],
-                    pubdate.format("YYYY-MMM-DD"),
+                    pubdate.strftime("%Y-%b-%d"),
                 )
 
         self._feed["items"] = result
@@ -323,21 +486,53 @@ class Feed(BaseFeed):
 
         return element
 
-    def get_items(self, count=1, filtered=True) -> list[Item]:
-        for element in self._feed["items"][:count]:
-            item = Item.from_rss_element(element)
+    def get_entries(self, count=1) -> list:
+        """Return the raw feed entries, without building any items."""
+        return self._feed["items"][:count]
 
-            if not filtered:
-                yield item
-            elif not is_item_ignored(item):
+    def build_item(self, element, filtered=True) -> Optional[Item]:
+        """Build an item from a feed entry.  Ignored items return `None`."""
+        item = Item.from_rss_element(element)
+
+        if filtered and is_item_ignored(item):
+            return None
+
+        return item
+
+    def get_items(self, count=1, filtered=True) -> list[Item]:
+        for element in self.get_entries(count=count):
+            if item := self.build_item(element, filtered=filtered):
                 yield item
 
+    def prefetch(self, items, workers=1):
+        """
+        Load the ratings for each store page (only once per page) so they're
+        already in `ratings_cache` when the items are rendered.
+        """
+        pages = {}
+        for item in items:
+            if steam_app_id(item.steam_store_link):
+                pages.setdefault(item.steam_store_link, item)
+
+        if not pages:
+            return
+
+        LOGGER.debug("Prefetching %d store pages", len(pages))
+        with ThreadPoolExecutor(max_workers=workers) as loaders:
+            for future in [
+                loaders.submit(item.get_steam_ratings) for item in pages.values()
+            ]:
+                try:
+                    future.result()
+                except Exception as e:
+                    LOGGER.warning("Could not prefetch a store page: %s", e)
+
 
 def is_item_expired(item: Item) -> bool:
     expired = False
     if (
         item.good_through_datetime
-        and pendulum.now(tz=configuration["timezone"]) >= item.good_through_datetime
+        and dates.now(configuration["timezone"]) >= item.good_through_datetime
     ):
         LOGGER.debug("offer expired for %s...", item.title[:20])
         expired = True
@@ -346,28 +541,12 @@ def is_item_expired(item: Item) -> bool:
 
 
 def is_item_ignored_by_url(item: Item) -> bool:
-    ignore_rules = configuration.get("ignore", {})
-
-    for url_search in ignore_rules.get("urls", []):
-        for url in [item.steam_link, item.steam_store_link, item.game_link]:
-            if not url:
-                continue
-
-            if re.search(url_search, url, re.IGNORECASE):
-                LOGGER.debug("Ignoring url: %s", url)
-                return True
-
-    return False
+    urls = [item.steam_link, item.steam_store_link, item.game_link]
+    return get_ignore_rules().match_urls(urls) is not None
 
 
 def is_item_ignored_by_title(item: Item) -> bool:
-    ignore_rules = configuration.get("ignore", {})
-
-    for title_search in ignore_rules.get("titles", []):
-        if item.title and re.search(title_search, item.title, re.IGNORECASE):
-            return True
-
-    return False
+    return get_ignore_rules().match_title(item.title) is not None
 
 
 def is_item_ignored(item: Item) -> bool:
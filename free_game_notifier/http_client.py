@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the HTTP client shared by the whole application.
+
+Every request goes through a single `requests.Session` so connections are kept
+alive per host.  Each request gets a connect/read timeout, idempotent requests
+(GET and HEAD) are retried with a capped backoff, and we keep track of the
+number of requests and their latency for each host.
+
+requests is only imported once the first request is made.
+"""
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    import requests
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ResponseTooLarge(ValueError):
+    pass
+
+
+def read_limited(response: "requests.Response", max_bytes: int) -> bytes:
+    """
+    Read the (decompressed) body of a streamed response, giving up once it's
+    larger than `max_bytes`.
+    """
+    length = response.headers.get("Content-Length")
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        response.close()
+        raise ResponseTooLarge(f"{response.url} is larger than {max_bytes} bytes")
+
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            response.close()
+            raise ResponseTooLarge(f"{response.url} is larger than {max_bytes} bytes")
+
+        chunks.append(chunk)
+
+    tracer.count("http.bytes_received", size)
+    return b"".join(chunks)
+
+
+class HttpClient:
+    __instance = None
+
+    def __init__(self):
+        if HttpClient.__instance is None:
+            HttpClient.__instance = self
+        else:
+            LOGGER.warning("Cannot initialize HttpClient() more than once")
+
+        self._lock = threading.Lock()
+        self._session = None
+        self.configure()
+
+    def configure(
+        self,
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 10,
+        pool_size: int = 10,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.options = {
+            "retries": retries,
+            "backoff_factor": backoff_factor,
+            "backoff_max": backoff_max,
+            "pool_size": pool_size,
+        }
+
+        with self._lock:
+            if self._session:
+                self._session.close()
+
+            # The new session is created on the next request
+            self._session = None
+
+        self.reset_stats()
+
+    @property
+    def session(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                self._session = self.create_session(**self.options)
+
+            return self._session
+
+    @staticmethod
+    def create_session(
+        retries: int, backoff_factor: float, backoff_max: float, pool_size: int
+    ) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util import Retry
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def _record(self, url: str, seconds: float, error: bool):
+        host = urlparse(url).netloc
+        with self._lock:
+            stats = self._stats.setdefault(
+                host, {"requests": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            )
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        kwargs.setdefault("timeout", self.timeout)
+
+        error = True
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = not response.ok
+            if tracer.enabled:
+                self._count_bytes(response, streamed=kwargs.get("stream"))
+
+            return response
+        finally:
+            self._record(url, time.perf_counter() - start, error)
+
+    @staticmethod
+    def _count_bytes(response: "requests.Response", streamed: bool = False):
+        """
+        Count the bytes sent and received.  The body of a streamed response is
+        counted by `read_limited()` once it's read.
+        """
+        tracer.count("http.requests")
+        if request := getattr(response, "request", None):
+            body = request.body or b""
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+
+            tracer.count("http.bytes_sent", len(body))
+
+        if not streamed:
+            tracer.count("http.bytes_received", len(response.content or b""))
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """Return a copy of the per-host request counts and latency."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def log_stats(self):
+        for host, stats in sorted(self.stats().items()):
+            LOGGER.info(
+                "%s: %d requests (%d errors), %.3fs average, %.3fs max",
+                host,
+                stats["requests"],
+                stats["errors"],
+                stats["seconds"] / stats["requests"],
+                stats["max_seconds"],
+            )
+
+
+http_client = HttpClient()
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from urllib.parse import urlparse
 import logging
-
-import requests
+import re
+from urllib.parse import urlparse
 
 from .config import configuration
+from .http_client import http_client
+from .store import TtlStore
 
 LOGGER = logging.getLogger(__name__)
 
@@ -16,6 +17,93 @@ default_icon_urls = {
 }
 
 
+class IconMatcher:
+    """
+    Match a URL against a set of partial strings, merged once from the
+    mappings and compiled into a single pattern.
+
+    When more than one partial string is found in the URL, the one that was
+    given first wins, even when the strings overlap.
+    """
+
+    def __init__(self, *mappings: dict):
+        self.icons = {}
+        for mapping in mappings:
+            for partial_string, icon_url in (mapping or {}).items():
+                self.icons.setdefault(partial_string, icon_url)
+
+        self.priority = {
+            partial_string: index for index, partial_string in enumerate(self.icons)
+        }
+
+        # The lookahead finds a match at every position, so overlapping strings
+        # are all found.  At each position, the first one given wins.
+        self.pattern = None
+        if self.icons:
+            alternatives = "|".join(re.escape(key) for key in self.icons)
+            self.pattern = re.compile(f"(?=({alternatives}))")
+
+    def match(self, url: str):
+        if not self.pattern or not (found := self.pattern.findall(url)):
+            return None
+
+        return self.icons[min(found, key=self.priority.__getitem__)]
+
+
+class IconCache(TtlStore):
+    """
+    Remember the favicon found (or not found) for each site.  Sites without a
+    favicon are kept for `negative_ttl` seconds.
+    """
+
+    def __init__(self):
+        super().__init__(name="icons")
+
+    def configure(self, path=None, negative_ttl: float = 86400, **kwargs):
+        super().configure(path, negative_ttl=negative_ttl, **kwargs)
+
+
+icon_cache = IconCache()
+_matcher = (None, None)
+
+
+def get_matcher() -> IconMatcher:
+    """Return the matcher for the current configuration."""
+    global _matcher
+
+    version, matcher = _matcher
+    if version != configuration.version:
+        matcher = IconMatcher(configuration.get("icons"), default_icon_urls)
+        _matcher = (configuration.version, matcher)
+
+    return matcher
+
+
+def probe_favicon(icon_url: str):
+    """
+    Return `icon_url` if it exists.  We try a HEAD request first, then fall back
+    to a GET (without reading the body) for servers that don't support HEAD.
+    """
+    import requests
+
+    try:
+        response = http_client.head(icon_url, allow_redirects=True)
+        if response.status_code in (403, 405, 501):
+            response = http_client.get(icon_url, stream=True)
+            response.close()
+
+        response.raise_for_status()
+        return icon_url
+    except requests.HTTPError:
+        LOGGER.warning(
+            "Invalid icon URL (return code %s): %s", response.status_code, icon_url
+        )
+    except requests.ConnectionError as e:
+        LOGGER.warning("Error while connecting to %s: %s", icon_url, e)
+
+    return None
+
+
 def icon_from_url(url: str):
     """
     A very simple attempt at matching up a game URL with its representing icon.
@@ -25,29 +113,16 @@ def icon_from_url(url: str):
     if not url:
         return
 
-    # Allow the user to override icons in the configuration
-    for partial_string, icon_url in configuration.get("icons").items():
-        if partial_string in url:
-            return icon_url
-
-    # Try some known-good icons
-    for partial_string, icon_url in default_icon_urls.items():
-        if partial_string in url:
-            return icon_url
+    # Allow the user to override icons in the configuration, then try some
+    # known-good icons
+    if icon_url := get_matcher().match(url):
+        return icon_url
 
     # Try the site's favicon
     parts = urlparse(url)
     if parts.netloc:
-        icon_url = f"{parts.scheme}://{parts.netloc}/favicon.ico"
-        response = requests.get(icon_url)
-        try:
-            response.raise_for_status()
-            return icon_url
-        except requests.HTTPError:
-            LOGGER.warning(
-                "Invalid icon URL (return code %s): %s", response.status_code, icon_url
-            )
-        except requests.ConnectionError as e:
-            LOGGER.warning("Error while connecting to %s: %s", icon_url, e)
+        site = f"{parts.scheme}://{parts.netloc}"
+        icon_url = f"{site}/favicon.ico"
+        return icon_cache.get_or_load(site, lambda: probe_favicon(icon_url))
 
     return None
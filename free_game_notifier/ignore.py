@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module compiles the `ignore` section of the configuration.
+
+Each list of rules (e.g. `titles` or `urls`) is combined into a single
+case-insensitive regex, so a value that isn't ignored (most of them) only needs
+to be searched once no matter how many rules there are.  When it matches, the
+rules are searched one at a time to find out which one it was.  The `.*` at the
+start and end of a rule are removed first: they don't change what matches, but
+they make every alternative scan to the end of the value.  We also count how
+many times each rule matched.
+
+    ignore:
+        urls:
+            - ".*bigfishgames.*"
+        titles:
+            - ".*big fish.*"
+"""
+import logging
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from .config import configuration
+
+LOGGER = logging.getLogger(__name__)
+
+# e.g. `\1` or `(?(1)...)`
+NUMBERED_REFERENCE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+# `.*` at the start of a rule, unless it's lazy or possessive (e.g. `.*?`)
+LEADING_WILDCARD = re.compile(r"^(?:\.\*(?![?+{]))+")
+
+
+def strip_wildcards(rule: str) -> str:
+    """
+    Remove the `.*` at the start and end of `rule`, which don't change whether
+    `search()` finds a match.  e.g. `.*big fish.*` becomes `big fish`.
+    """
+    rule = LEADING_WILDCARD.sub("", rule)
+    while rule.endswith(".*"):
+        head = rule[:-2]
+
+        # An odd number of backslashes means the `.` is escaped
+        if (len(head) - len(head.rstrip("\\"))) % 2:
+            break
+
+        rule = head
+
+    return rule
+
+
+class RuleSet:
+    """A list of regular expressions, searched as a single pattern first."""
+
+    def __init__(self, rules: Iterable[str]):
+        self.rules = [str(rule) for rule in rules or []]
+        self.pattern = None
+
+        stripped = [strip_wildcards(rule) for rule in self.rules]
+        self.patterns = [re.compile(rule, re.IGNORECASE) for rule in stripped]
+
+        if not self.rules:
+            return
+
+        # Rules with numbered group references would point at the wrong group
+        # once they're combined.  The rules aren't wrapped in (named) capturing
+        # groups, since that keeps `re` from merging their common prefixes.
+        if not any(NUMBERED_REFERENCE.search(rule) for rule in self.rules):
+            try:
+                self.pattern = re.compile(
+                    "|".join(f"(?:{rule})" for rule in stripped), re.IGNORECASE
+                )
+                return
+            except re.error:
+                pass
+
+        # Some rules can't be combined (e.g. they use global flags or the same
+        # group names), so they're only searched one at a time.
+        LOGGER.debug("Could not combine rules; searching them separately")
+
+    def search(self, value: str) -> Optional[str]:
+        """Return the first rule that matches `value`."""
+        if not value:
+            return None
+
+        if self.pattern and not self.pattern.search(value):
+            return None
+
+        for rule, pattern in zip(self.rules, self.patterns):
+            if pattern.search(value):
+                return rule
+
+        return None
+
+
+class IgnoreRules:
+    def __init__(self, rules: Optional[dict] = None):
+        rules = rules or {}
+        self.titles = RuleSet(rules.get("titles"))
+        self.urls = RuleSet(rules.get("urls"))
+        self.hits = Counter()
+
+    def match_title(self, title: str) -> Optional[str]:
+        if rule := self.titles.search(title):
+            self.hits[("titles", rule)] += 1
+
+        return rule
+
+    def match_urls(self, urls: Iterable[str]) -> Optional[str]:
+        for url in urls:
+            if rule := self.urls.search(url):
+                LOGGER.debug("Ignoring url: %s", url)
+                self.hits[("urls", rule)] += 1
+                return rule
+
+        return None
+
+    def log_stats(self):
+        for (field, rule), count in self.hits.most_common():
+            LOGGER.info("Ignore rule %s %r matched %d times", field, rule, count)
+
+
+_rules = (None, None)
+
+
+def get_ignore_rules() -> IgnoreRules:
+    """Return the compiled rules for the current configuration."""
+    global _rules
+
+    version, rules = _rules
+    if version != configuration.version:
+        rules = IgnoreRules(configuration.get("ignore"))
+        _rules = (configuration.version, rules)
+
+    return rules
@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
+"""
+Logging setup.
+
+Records are handed to a queue and formatted and written by a background thread
+(`QueueListener`), so logging doesn't slow down the threads doing the work.
+The message is merged with its arguments before it's queued, so it shows the
+values at the time of the call.  The exception is `LazyPformat`, which is only
+converted on the listener thread, when the record is actually written.
+
+    logging:
+        format: text  # or json, for one JSON object per line
+        queue: true
+"""
+import atexit
+import copy
+import json
 import logging
 import os
-
-import pendulum
+from functools import lru_cache
+from logging.handlers import QueueHandler as BaseQueueHandler
+from logging.handlers import QueueListener
+from pprint import pformat
+from queue import SimpleQueue
 
 from .config import configuration
+from .dates import from_timestamp
 
 __logger = None
+_listener = None
+_queue_handler = None
 
 
+@lru_cache(maxsize=None)
 def shorten_path(path):
     """
     This seems like a pretty bad idea, but I'm doing it anyway.
@@ -23,11 +46,27 @@ def shorten_path(path):
     return path.replace(base + os.path.sep, "")
 
 
+class LazyPformat:
+    """Pretty-print `value` only if the log record is written."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return pformat(self.value)
+
+
 class Formatter(logging.Formatter):
     """override logging.Formatter to use an aware datetime object"""
 
-    def __init__(self, timezone, *args, **kwargs):
+    def __init__(self, timezone=None, *args, **kwargs):
+        # Without a timezone, the configured one is looked up for each record
+        # since the settings file isn't loaded until `main()`.
         self._timezone = timezone
+        self._last_second = (None, None)
+        self._last_time = (None, None)
         super().__init__(*args, **kwargs)
 
     def format(self, record):
@@ -36,29 +75,152 @@ class Formatter(logging.Formatter):
         return super().format(record)
 
     def converter(self, timestamp):
-        dt = pendulum.from_timestamp(timestamp)
-        return dt.in_tz(self._timezone)
+        return from_timestamp(
+            timestamp, self._timezone or configuration.get("timezone", "UTC")
+        )
+
+    def to_datetime(self, created: float):
+        """
+        Return the (whole second) datetime for a record.  Records come in
+        bursts, so we remember the last second instead of converting the
+        timestamp for each one.
+        """
+        timezone = self._timezone or configuration.get("timezone", "UTC")
+        key = (int(created), timezone)
+        if self._last_second[0] != key:
+            self._last_second = (key, from_timestamp(key[0], timezone))
+
+        return self._last_second[1]
 
     def formatTime(self, record, datefmt=None):
-        dt = self.converter(record.created)
+        dt = self.to_datetime(record.created)
+        key = (self._last_second[0], datefmt)
+        if self._last_time[0] == key:
+            return self._last_time[1]
+
         if datefmt:
             s = dt.strftime(datefmt)
         else:
             s = dt.isoformat()
+
+        self._last_time = (key, s)
         return s
 
 
+class JsonFormatter(Formatter):
+    """Format each record as a single line of JSON."""
+
+    def formatTime(self, record, datefmt=None):
+        """Return the ISO 8601 time of the record, to the millisecond."""
+        microsecond = int((record.created % 1) * 1000) * 1000
+        return (
+            self.to_datetime(record.created)
+            .replace(microsecond=microsecond)
+            .isoformat(timespec="milliseconds")
+        )
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "timestamp": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "path": shorten_path(record.pathname),
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            data["exception"] = record.exc_text
+
+        return json.dumps(data, default=str)
+
+
+def has_lazy_args(args) -> bool:
+    values = args.values() if isinstance(args, dict) else (args or ())
+    return any(isinstance(value, LazyPformat) for value in values)
+
+
+class QueueHandler(BaseQueueHandler):
+    """
+    Merge the message with its arguments and put the record on the queue.
+
+    Unlike the base class, the record isn't formatted here (that's done on the
+    listener thread), and messages with `LazyPformat` arguments are left for
+    the listener to merge.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.args and not has_lazy_args(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+
+        return record
+
+
 def set_root_level(level):
     logging.getLogger().setLevel(level)
 
 
-handler = logging.StreamHandler()
-handler.setFormatter(
-    Formatter(
-        configuration.get("timezone", "UTC"),
+def stop_listener():
+    """
+    Write out any queued records and stop the listener thread.  Records
+    logged afterwards (e.g. while shutting down) are written directly.
+    """
+    global _listener, _queue_handler
+
+    if _queue_handler:
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        root.addHandler(handler)
+        _queue_handler = None
+
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(log_format: str = "text", queue: bool = True):
+    """
+    Set the format of the log output, and whether records are written by a
+    background thread.
+    """
+    global _listener, _queue_handler
+
+    if log_format not in FORMATTERS:
+        raise ValueError(f"Unknown log format: '{log_format}'")
+
+    stop_listener()
+    handler.setFormatter(FORMATTERS[log_format])
+
+    root = logging.getLogger()
+    root.removeHandler(handler)
+
+    if queue:
+        records = SimpleQueue()
+        _listener = QueueListener(records, handler)
+        _listener.start()
+        _queue_handler = QueueHandler(records)
+        root.addHandler(_queue_handler)
+    else:
+        root.addHandler(handler)
+
+
+FORMATTERS = {
+    "text": Formatter(
         fmt="%(asctime)s {%(pathname)20s:%(lineno)3s} %(levelname)s: %(message)s",
         datefmt="%m/%d/%Y %H:%M:%S %Z",
-    )
-)
+    ),
+    "json": JsonFormatter(),
+}
+
+handler = logging.StreamHandler()
+handler.setFormatter(FORMATTERS["text"])
 
 logging.basicConfig(level=logging.INFO, handlers=[handler])
+atexit.register(stop_listener)
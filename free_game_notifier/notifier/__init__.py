@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from ..factory import ClassFactory
-from .slack import Notifier as SlackNotifier
 
-notifier_factory = ClassFactory()
-notifier_factory.register("slack", SlackNotifier)
+notifier_factory = ClassFactory(entry_point_group="free_game_notifier.notifiers")
+notifier_factory.register("slack", "free_game_notifier.notifier.slack:Notifier")
@@ -2,42 +2,160 @@
 # -*- coding: utf-8 -*-
 """
 A module that communicates with Slack.
+
+In batch mode (`notifier_options.slack.batch`), every item going to the same
+webhook is packed into as few messages as Slack's limits allow.
+
+Messages to each webhook are rate limited (Slack allows about one per second),
+and a 429 response is retried after its `Retry-After` delay as long as that's
+no longer than `max_wait` seconds.
 """
 import logging
-from pprint import pformat
-
-import pendulum
-import requests
+import time
 
 from ..abc.notifier import Notifier as BaseNotifier
 from ..config import configuration
+from ..http_client import http_client
+from ..logger import LazyPformat
+from ..ratelimit import backoff_delay, parse_retry_after, rate_limiter
 
 LOGGER = logging.getLogger(__name__)
 
+# Slack allows up to 50 blocks per message, and truncates messages longer than
+# 40,000 characters.
+MAX_BLOCKS = 50
+MAX_CHARACTERS = 40000
+
+DIVIDER = {"type": "divider"}
+
+
+def message_length(data: dict) -> int:
+    """Return the number of characters of text in a message."""
+    length = len(data.get("text", ""))
+    for block in data.get("blocks", []):
+        length += len((block.get("text") or {}).get("text", ""))
+
+    return length
+
+
+def pack_messages(messages: list[tuple]) -> list[tuple]:
+    """
+    Combine the `(item, data)` messages into as few messages as possible.
+    Items are separated by a divider block.
+
+    Returns a list of `(items, data)`.
+    """
+    result = []
+    items, blocks, titles, length = [], [], [], 0
+
+    def flush():
+        if items:
+            data = {"text": ", ".join(titles), "blocks": blocks}
+            result.append((items, data))
+
+    for item, data in messages:
+        new_blocks = ([DIVIDER] if blocks else []) + data["blocks"]
+        new_length = message_length(data) + 2
+
+        if items and (
+            (len(blocks) + len(new_blocks) > MAX_BLOCKS)
+            or (length + new_length > MAX_CHARACTERS)
+        ):
+            flush()
+            items, blocks, titles, length = [], [], [], 0
+            new_blocks = data["blocks"]
+
+        items = items + [item]
+        blocks = blocks + new_blocks
+        titles = titles + [data.get("text", "")]
+        length += new_length
+
+    flush()
+    return result
+
 
 class Notifier(BaseNotifier):
     notifier_type: str = "slack"
+    supports_batch: bool = True
 
-    def send(self, item) -> bool:
-        if not item:
-            LOGGER.error("item is not defined")
-            return
-
-        slack_data = item.format_message(self)
-        LOGGER.debug(pformat(slack_data))
+    def deliver(self, slack_data: dict) -> bool:
+        """Post a message to the webhook.  Returns `True` if it was sent."""
+        LOGGER.debug("%s", LazyPformat(slack_data))
 
         if configuration["dry-run"]:
             LOGGER.debug("dry-run: not sending slack message")
-            return
+            return False
 
         if self.url:
-            response = requests.post(self.url, json=slack_data)
-            response.raise_for_status()
+            self.post_with_retries(slack_data).raise_for_status()
         else:
             LOGGER.debug("`url` not defined; not notifying Slack")
 
-        item.posted = pendulum.now(tz="UTC").timestamp()
-
         LOGGER.debug("...done")
 
         return True
+
+    def post_with_retries(self, slack_data: dict):
+        """
+        Post the message once the rate limiter allows it, retrying when Slack
+        responds with a 429.  Returns the last response.
+        """
+        options = self.get_options()
+        max_retries = options.get("max_retries", 3)
+
+        for attempt in range(max_retries + 1):
+            rate_limiter.acquire(
+                self.url, rate=options.get("rate", 1), burst=options.get("burst", 1)
+            )
+            response = http_client.post(self.url, json=slack_data)
+            if response.status_code != 429:
+                break
+
+            delay = backoff_delay(
+                attempt,
+                options.get("backoff_factor", 1),
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+            if (attempt == max_retries) or (delay > options.get("max_wait", 30)):
+                rate_limiter.throttled(self.url, None)
+                break
+
+            LOGGER.info("Rate limited by Slack; retrying in %.1fs", delay)
+            rate_limiter.throttled(self.url, delay)
+
+        return response
+
+    def send(self, item) -> bool:
+        if not item:
+            LOGGER.error("item is not defined")
+            return
+
+        if not self.deliver(self.render(item)):
+            return
+
+        item.posted = time.time()
+
+        return True
+
+    def send_batch(self, items) -> list:
+        messages = pack_messages([(item, self.render(item)) for item in items])
+        LOGGER.debug(
+            "Sending %d items to %s in %d messages", len(items), self.url, len(messages)
+        )
+
+        sent = []
+        for batch, slack_data in messages:
+            try:
+                if not self.deliver(slack_data):
+                    continue
+            except Exception:
+                LOGGER.error("Failed to send %d items", len(batch), exc_info=True)
+                continue
+
+            posted = time.time()
+            for item in batch:
+                item.posted = posted
+
+            sent.extend(batch)
+
+        return sent
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the outbox: notifications that have been rendered but not
+delivered yet.
+
+Every payload is added to the outbox before it's sent, and removed once it has
+been delivered.  When a delivery fails, the payload stays in the outbox and is
+retried on a later run with an exponential backoff.  Retrying only needs the
+stored payload, so we don't have to build, enrich, and render the item again.
+After `max_attempts` failures, the entry is marked as dead and left in the
+outbox file so it can be looked at, until it's older than the cache age.  Until
+then, the item isn't planned (and queued) again for that target either.
+
+    outbox:
+        max_attempts: 5
+        backoff: 300
+        backoff_max: 86400
+"""
+import logging
+import time
+from typing import Optional
+
+from .store import JsonStore
+
+LOGGER = logging.getLogger(__name__)
+
+PENDING = "pending"
+DEAD = "dead"
+
+
+class Outbox(JsonStore):
+    def __init__(self):
+        super().__init__()
+        self.max_attempts = 5
+        self.backoff = 300
+        self.backoff_max = 86400
+
+    def configure(
+        self,
+        path: Optional[str] = None,
+        max_attempts: int = 5,
+        backoff: float = 300,
+        backoff_max: float = 86400,
+    ):
+        super().configure(path)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def add(
+        self,
+        key: str,
+        notifier_name: str,
+        url: Optional[str],
+        payload,
+        item: dict,
+    ):
+        """Add a rendered payload for the notifier target."""
+        self[key] = {
+            "notifier": notifier_name,
+            "url": url,
+            "payload": payload,
+            "item": item,
+            "attempts": 0,
+            "next_attempt": 0,
+            "status": PENDING,
+            "error": None,
+            "updated": time.time(),
+        }
+
+    def delivered(self, key: str):
+        self.pop(key)
+
+    def failed(self, key: str, error: Optional[Exception] = None):
+        """Record a failed delivery and schedule the next attempt."""
+        with self._lock:
+            if not (entry := self.get(key)):
+                return
+
+            entry = dict(entry)
+            entry["attempts"] += 1
+            entry["error"] = str(error) if error else None
+            entry["updated"] = time.time()
+
+            if entry["attempts"] >= self.max_attempts:
+                entry["status"] = DEAD
+                LOGGER.warning(
+                    "Giving up on %s after %d attempts: %s",
+                    entry["item"].get("title"),
+                    entry["attempts"],
+                    entry["error"],
+                )
+            else:
+                delay = min(
+                    self.backoff * (2 ** (entry["attempts"] - 1)), self.backoff_max
+                )
+                entry["next_attempt"] = time.time() + delay
+
+            self[key] = entry
+
+    def prune(self, days_older_than: float) -> int:
+        """
+        Remove the entries that haven't been updated in `days_older_than`
+        days.  Returns the number that were removed.
+        """
+        if not days_older_than:
+            return 0
+
+        cutoff = time.time() - (days_older_than * 24 * 60 * 60)
+        with self._lock:
+            expired = [
+                key
+                for key, entry in self.data.items()
+                if entry.get("updated", 0) < cutoff
+            ]
+            for key in expired:
+                self.pop(key)
+
+        if expired:
+            LOGGER.info("Removed %d old entries from the outbox", len(expired))
+
+        return len(expired)
+
+    def due(self, now: Optional[float] = None) -> list[tuple[str, dict]]:
+        """Return the `(key, entry)` of every pending entry ready to be retried."""
+        now = time.time() if now is None else now
+        return [
+            (key, entry)
+            for key, entry in list(self.data.items())
+            if entry["status"] == PENDING and entry["next_attempt"] <= now
+        ]
+
+    def counts(self) -> dict:
+        result = {PENDING: 0, DEAD: 0}
+        for entry in list(self.data.values()):
+            result[entry["status"]] += 1
+
+        return result
+
+
+outbox = Outbox()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the rate limiter used by the notifiers.
+
+Each target (e.g. a Slack webhook URL) gets its own token bucket, shared by
+every thread sending to it.  When a server tells us to slow down (e.g. a 429
+with `Retry-After`), the bucket is paused so the other threads wait as well.
+
+We keep track of how often and how long we waited for each target so it can be
+logged at the end of the run.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+LOGGER = logging.getLogger(__name__)
+
+
+def parse_retry_after(
+    value: Optional[str], now: Callable = time.time
+) -> Optional[float]:
+    """
+    Return the number of seconds in a `Retry-After` header, which is either a
+    number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        LOGGER.debug("Could not parse Retry-After: %s", value)
+
+    return None
+
+
+def backoff_delay(attempt: int, backoff_factor: float, retry_after: float = None):
+    """
+    Return how long to wait before retry number `attempt` (starting at 0).
+
+    We use the server's `Retry-After` when there is one, plus up to a second of
+    jitter so our threads don't all retry at once.  Otherwise the delay is
+    exponential with full jitter.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+
+    return random.uniform(0, backoff_factor * (2**attempt))
+
+
+def describe(key: str) -> str:
+    """Return a loggable name for a URL, without the secret part of the path."""
+    parsed = urlparse(key or "")
+    if not parsed.netloc:
+        return str(key)
+
+    return f"{parsed.netloc}/...{parsed.path[-4:]}"
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average, with bursts of up to
+    `burst` operations.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable = time.monotonic):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, and return the number of seconds the caller has to wait
+        before using it.
+        """
+        with self._lock:
+            now = self.clock()
+            # While paused, tokens are handed out starting at the end of the
+            # pause, so the waiters are still spaced out by the rate.
+            start = max(now, self.paused_until)
+            if self.rate:
+                elapsed = max(start - self.updated, 0.0)
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.tokens -= 1
+
+            self.updated = max(start, self.updated)
+
+            wait = start - now
+            if self.rate and self.tokens < 0:
+                wait += -self.tokens / self.rate
+
+            return wait
+
+    def pause(self, seconds: float):
+        """
+        Don't hand out any tokens for the next `seconds`.  When the pause ends,
+        there's a single token, so we don't send a burst right after a server
+        asked us to slow down.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.updated = self.paused_until
+            self.tokens = min(self.capacity, 1.0)
+
+
+class RateLimiter:
+    def __init__(self, sleep: Callable = time.sleep):
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.buckets = {}
+        self.reset_stats()
+
+    def get_bucket(self, key: str, rate: float, burst: int = 1) -> TokenBucket:
+        """
+        Return the bucket for `key`.  It's replaced when `rate` or `burst` no
+        longer match (i.e. the configuration changed), keeping any pause.
+        """
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if (
+                (bucket is None)
+                or (bucket.rate != rate)
+                or (bucket.capacity != max(burst, 1))
+            ):
+                new_bucket = TokenBucket(rate, burst)
+                if bucket and (remaining := bucket.paused_until - bucket.clock()) > 0:
+                    new_bucket.pause(remaining)
+
+                bucket = self.buckets[key] = new_bucket
+
+            return bucket
+
+    def _record(self, key: str, **counts):
+        with self._lock:
+            stats = self._stats.setdefault(
+                key,
+                {
+                    "requests": 0,
+                    "delayed": 0,
+                    "wait_seconds": 0.0,
+                    "max_wait": 0.0,
+                    "throttled": 0,
+                    "gave_up": 0,
+                },
+            )
+            for name, count in counts.items():
+                if name == "max_wait":
+                    stats[name] = max(stats[name], count)
+                else:
+                    stats[name] += count
+
+    def acquire(self, key: str, rate: float, burst: int = 1) -> float:
+        """
+        Wait until we're allowed to send to `key`.  Returns the number of
+        seconds we waited.
+        """
+        wait = self.get_bucket(key, rate, burst).reserve()
+        self._record(
+            key,
+            requests=1,
+            delayed=int(wait > 0),
+            wait_seconds=wait,
+            max_wait=wait,
+        )
+
+        if wait > 0:
+            self.sleep(wait)
+
+        return wait
+
+    def throttled(self, key: str, delay: Optional[float]):
+        """
+        Record that `key` asked us to slow down, and pause its bucket for
+        `delay` seconds.  Use `None` when we're giving up instead.
+        """
+        if delay is None:
+            self._record(key, throttled=1, gave_up=1)
+            return
+
+        self._record(key, throttled=1)
+        if bucket := self.buckets.get(key):
+            bucket.pause(delay)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def stats(self) -> dict:
+        """Return a copy of the counters for each key."""
+        with self._lock:
+            return {key: dict(stats) for key, stats in self._stats.items()}
+
+    def report(self) -> dict:
+        """Return the counters for each key, with the secrets left out."""
+        return {describe(key): stats for key, stats in sorted(self.stats().items())}
+
+    def log_stats(self):
+        for key, stats in sorted(self.stats().items()):
+            LOGGER.info(
+                "%s: %d sends, %d delayed (%.3fs total, %.3fs max), "
+                "%d throttled, %d gave up",
+                describe(key),
+                stats["requests"],
+                stats["delayed"],
+                stats["wait_seconds"],
+                stats["max_wait"],
+                stats["throttled"],
+                stats["gave_up"],
+            )
+
+
+rate_limiter = RateLimiter()
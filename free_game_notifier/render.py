@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module holds the registry used to render items for each notifier.
+
+Renderers are registered for a `(feed type, notifier type)` pair, so adding a
+new notifier doesn't require changes to the feed modules:
+
+    >>> @renderers.register("steam", "discord")
+    ... def render_discord(item):
+    ...     return {"content": item.title}
+
+Templates are compiled once per process.  When a bytecode cache folder is
+configured, the compiled templates are also stored on disk for the next run.
+jinja2 isn't imported until the first template is needed.
+
+The rendered payloads are remembered for the rest of the run by `payloads`, so
+an item going to many targets of the same notifier type is only rendered (and
+enriched) once.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RendererRegistry:
+    def __init__(self):
+        self.renderers = {}
+        self.sources = {}
+        self.configure()
+
+    def configure(self, bytecode_cache_dir: Optional[str] = None):
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self._environment = None
+
+    @property
+    def environment(self) -> "Environment":
+        if self._environment is None:
+            from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+            bytecode_cache = None
+            if self.bytecode_cache_dir:
+                os.makedirs(self.bytecode_cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(self.bytecode_cache_dir)
+
+            self._environment = Environment(
+                loader=DictLoader(self.sources), bytecode_cache=bytecode_cache
+            )
+
+        return self._environment
+
+    def register(self, feed_type: str, notifier_type: str, renderer=None):
+        """
+        Register the function used to render items from `feed_type` for
+        `notifier_type`.  This can also be used as a decorator.
+        """
+
+        def _register(renderer: Callable):
+            self.renderers[(feed_type, notifier_type)] = renderer
+            return renderer
+
+        if renderer is None:
+            return _register
+
+        return _register(renderer)
+
+    def register_template(self, name: str, source: str):
+        self.sources[name] = source
+
+    def get_template(self, name: str) -> "Template":
+        """Return the compiled template; it's only compiled the first time."""
+        return self.environment.get_template(name)
+
+    def render(self, item, notifier):
+        key = (item.feed_type, notifier.notifier_type)
+        if not (renderer := self.renderers.get(key)):
+            raise NotImplementedError(
+                f"Notifier type {type(notifier)} is not implemented for {key[0]}"
+            )
+
+        return renderer(item)
+
+
+class PayloadMemo:
+    """
+    Remembers the payload rendered for each `(item, notifier type)`.
+
+    When several threads need the same payload at once, only the first one
+    renders it and the others wait for the result.  Failures aren't
+    remembered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payloads = {}
+
+    def clear(self):
+        with self._lock:
+            self._payloads = {}
+
+    def __len__(self):
+        return len(self._payloads)
+
+    @staticmethod
+    def get_key(item, notifier_type: str) -> tuple:
+        return (item.feed_type, item.title, item.summary, notifier_type)
+
+    def get(self, item, notifier_type: str, render: Callable[[], Any]):
+        key = self.get_key(item, notifier_type)
+
+        with self._lock:
+            future = self._payloads.get(key)
+            if owner := future is None:
+                future = self._payloads[key] = Future()
+
+        tracer.count("cache.payloads.miss" if owner else "cache.payloads.hit")
+
+        if owner:
+            try:
+                future.set_result(render())
+            except Exception as e:
+                with self._lock:
+                    self._payloads.pop(key, None)
+
+                future.set_exception(e)
+
+        return future.result()
+
+
+renderers = RendererRegistry()
+payloads = PayloadMemo()
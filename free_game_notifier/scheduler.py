@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A small in-process scheduler used by the `--daemon` mode.
+
+Schedules use the standard 5-field cron syntax (minute, hour, day of month,
+month, day of week).  Each field supports `*`, numbers, ranges (`1-5`), steps
+(`*/2`, `1-10/3`), and comma-separated lists of those.
+"""
+import datetime
+import logging
+import random
+import threading
+from typing import Callable
+
+LOGGER = logging.getLogger(__name__)
+
+# (minimum, maximum) for each of the cron fields
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def parse_field(field: str, minimum: int, maximum: int) -> set:
+    """Convert a single cron field into the set of values it matches."""
+    values = set()
+
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = end = int(part)
+
+            # "5/15" means "every 15, starting at 5"
+            if step > 1:
+                end = maximum
+
+        if not (minimum <= start <= end <= maximum) or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+
+        values.update(range(start, end + 1, step))
+
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expressions need 5 fields: {expression}")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_field(field, *limits) for field, limits in zip(fields, FIELD_RANGES)
+        )
+
+        # Both 0 and 7 are Sunday
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+
+        # Like cron, when both the day of month and the day of week are
+        # restricted, matching either of them is enough.
+        self._any_day = fields[2] == "*" or fields[4] == "*"
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, dt: datetime.datetime) -> bool:
+        day = dt.day in self.days
+        weekday = ((dt.weekday() + 1) % 7) in self.weekdays
+
+        if self._any_day:
+            return day and weekday
+
+        return day or weekday
+
+    def next_after(self, dt: datetime.datetime) -> datetime.datetime:
+        """Return the first matching time after `dt`."""
+        dt = dt.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=366 * 5)
+
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1) + datetime.timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+            else:
+                return dt
+
+        raise ValueError(f"{self} never runs")
+
+
+class Scheduler:
+    """
+    Call a function according to a schedule until `stop()` is called.
+
+    A random delay of up to `jitter` seconds is added to each run so multiple
+    instances don't all hit the feeds at the same time.
+    """
+
+    def __init__(self, schedule: CronSchedule, jitter: float = 0):
+        self.schedule = schedule
+        self.jitter = max(float(jitter or 0), 0)
+        self._stop = threading.Event()
+
+    def stop(self, *args):
+        """Stop the scheduler.  This can be used directly as a signal handler."""
+        LOGGER.info("Stopping the scheduler")
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def next_run(self, now: datetime.datetime = None) -> datetime.datetime:
+        now = now or datetime.datetime.now()
+        delay = datetime.timedelta(seconds=random.uniform(0, self.jitter))
+        return self.schedule.next_after(now) + delay
+
+    def run(self, func: Callable[[], None]):
+        while not self.stopped:
+            next_run = self.next_run()
+            LOGGER.info("Next run at %s", next_run.strftime("%Y-%m-%d %H:%M:%S"))
+
+            # Wake up at least once a minute so a change to the system clock
+            # doesn't leave us sleeping for too long.
+            while not self.stopped and (now := datetime.datetime.now()) < next_run:
+                self._stop.wait(min((next_run - now).total_seconds(), 60))
+
+            if self.stopped:
+                break
+
+            try:
+                func()
+            except Exception:
+                LOGGER.error("Scheduled run failed", exc_info=True)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a small persistent key/value store for application state
+that doesn't belong in the notification cache (e.g. feed validators).  The
+`TtlStore` variant is used for values that expire, like store page ratings.
+
+Each store is a JSON file in the `state_dir` folder.  If `state_dir` isn't
+configured, the folder holding `cache_path` is used.  The store only lives in
+memory when neither of those is set.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from itertools import islice
+from typing import Any, Callable, Optional
+
+from .config import configuration
+from .tracing import tracer
+
+LOGGER = logging.getLogger(__name__)
+
+
+def state_path(filename: str) -> Optional[str]:
+    """Return the path used to persist the state file `filename`."""
+    if directory := configuration.get("state_dir"):
+        return os.path.join(directory, filename)
+
+    if cache_path := configuration.get("cache_path"):
+        return os.path.join(os.path.dirname(cache_path) or ".", filename)
+
+    return None
+
+
+class JsonStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.path = None
+        self.data = {}
+        self.dirty = False
+
+    def configure(self, path: Optional[str] = None):
+        with self._lock:
+            self.path = path
+            self.data = self.load(path)
+            self.dirty = False
+
+    def __getitem__(self, key):
+        return self.data.get(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self.data[key] = value
+            self.dirty = True
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key in self.data:
+                self.dirty = True
+
+            return self.data.pop(key, default)
+
+    def load(self, path):
+        data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as fh:
+                    data = json.loads(fh.read().strip() or "{}")
+            except ValueError:
+                LOGGER.warning("Ignoring unreadable state file: %s", path)
+
+        return data
+
+    def save(self):
+        if configuration.get("dry-run"):
+            LOGGER.debug("not saving %s due to dry-run", self.path)
+            return
+
+        if not (self.path and self.dirty):
+            return
+
+        with self._lock:
+            # Write to a temporary file first so a crash can't leave us with a
+            # half-written file.
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as fh:
+                fh.write(json.dumps(self.data))
+
+            os.replace(temp_path, self.path)
+            self.dirty = False
+
+
+class TtlStore(JsonStore):
+    """
+    A `JsonStore` where each entry expires after `ttl` seconds.
+
+    Expired entries younger than `ttl + stale_ttl` are still returned by
+    `get_or_load()`, but they are refreshed in a background thread
+    (stale-while-revalidate).  Empty values (e.g. from a failed lookup) expire
+    after `negative_ttl` seconds instead.  Once there are more than
+    `max_entries`, the oldest entries are removed.
+
+    Hits and misses are counted by the tracer under `cache.<name>`.
+    """
+
+    def __init__(self, name: str = "store"):
+        super().__init__()
+        self.name = name
+        self.ttl = 0
+        self.stale_ttl = 0
+        self.negative_ttl = None
+        self.max_entries = 0
+        self._refreshing = {}
+
+    def configure(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 86400,
+        stale_ttl: float = 0,
+        max_entries: int = 1000,
+        negative_ttl: Optional[float] = None,
+    ):
+        super().configure(path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+
+        # Entries are kept in the order they were updated, oldest first
+        with self._lock:
+            self.data = dict(
+                sorted(self.data.items(), key=lambda item: item[1]["updated"])
+            )
+
+    def ttl_for(self, value) -> float:
+        """Return the number of seconds `value` should be cached for."""
+        if not value and self.negative_ttl is not None:
+            return self.negative_ttl
+
+        return self.ttl
+
+    def set(self, key, value):
+        with self._lock:
+            # Re-insert the key so it moves to the end
+            self.data.pop(key, None)
+            self[key] = {"value": value, "updated": time.time()}
+
+            if self.max_entries and (len(self.data) > self.max_entries):
+                excess = len(self.data) - self.max_entries
+                for oldest in list(islice(self.data, excess)):
+                    del self.data[oldest]
+
+    def get_or_load(self, key, loader: Callable[[], Any]):
+        """
+        Return the cached value for `key`, calling `loader()` to get (and cache)
+        the value when it's missing or too old.
+        """
+        if entry := self.get(key):
+            age = time.time() - entry["updated"]
+            ttl = self.ttl_for(entry["value"])
+
+            if age < ttl:
+                tracer.count(f"cache.{self.name}.hit")
+                return entry["value"]
+
+            # Empty values are loaded again right away instead of being served
+            # while they're refreshed.
+            if entry["value"] and (age < ttl + self.stale_ttl):
+                tracer.count(f"cache.{self.name}.stale")
+                self.refresh(key, loader)
+                return entry["value"]
+
+        tracer.count(f"cache.{self.name}.miss")
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def refresh(self, key, loader: Callable[[], Any]):
+        """Call `loader()` in a background thread and cache the result."""
+
+        def _refresh():
+            try:
+                self.set(key, loader())
+            except Exception as e:
+                LOGGER.warning("Could not refresh %s: %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+
+            thread = threading.Thread(target=_refresh, name=f"refresh-{key}")
+            self._refreshing[key] = thread
+
+        thread.start()
+
+    def wait(self):
+        """Wait for any background refreshes to finish."""
+        with self._lock:
+            threads = list(self._refreshing.values())
+
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains lightweight timing spans for each stage of a run.
+
+When tracing is enabled, every span records how long it took, and counters
+keep track of things like bytes transferred and cache hits.  At the end of a
+run, they're written to a JSON report and (optionally) a Prometheus
+textfile-collector file.
+
+    tracing:
+        enabled: true
+        report_path: /var/lib/sfn/run_report.json
+        prometheus_path: /var/lib/node_exporter/sfn.prom
+
+When it's disabled, `span()` returns a shared no-op context manager and
+`count()` returns right away, so the spans can stay in the code.
+"""
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+LOGGER = logging.getLogger(__name__)
+
+NULL_SPAN = nullcontext()
+
+PROMETHEUS_PREFIX = "sfn"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of the sorted `values`."""
+    if not values:
+        return 0.0
+
+    index = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[index]
+
+
+def summarize(durations: list[float]) -> dict:
+    values = sorted(durations)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def write_atomic(path: str, text: str):
+    # The textfile collector may read the file at any time, so never leave a
+    # half-written one behind.
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as fh:
+        fh.write(text)
+
+    os.replace(temp_path, path)
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(
+        self,
+        enabled: bool = False,
+        report_path: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+    ):
+        self.enabled = bool(enabled)
+        self.report_path = report_path
+        self.prometheus_path = prometheus_path
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._durations = {}
+            self._counters = {}
+
+    def record(self, name: str, seconds: float):
+        """Add a span of `seconds` to the stage `name`."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._durations.setdefault(name, []).append(seconds)
+
+    def count(self, name: str, value: int = 1):
+        """Add `value` to the counter `name`."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def _span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def span(self, name: str):
+        """
+        Time the block as a span of the stage `name`.
+
+        Usage:
+
+            >>> with tracer.span("cache.save"):
+            ...     backend.save()
+        """
+        if not self.enabled:
+            return NULL_SPAN
+
+        return self._span(name)
+
+    def traced(self, name: str):
+        """Decorate a function so each call is timed as a span of `name`."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                with self._span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self, **extra) -> dict:
+        """Return the stage timings and counters, along with `extra`."""
+        with self._lock:
+            durations = {
+                name: list(values) for name, values in self._durations.items()
+            }
+            counters = dict(self._counters)
+
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "stages": {
+                name: summarize(values) for name, values in sorted(durations.items())
+            },
+            "counters": dict(sorted(counters.items())),
+            **extra,
+        }
+
+    @staticmethod
+    def to_prometheus(report: dict) -> str:
+        """Format a report for the Prometheus textfile collector."""
+        duration = f"{PROMETHEUS_PREFIX}_stage_duration_seconds"
+        max_duration = f"{PROMETHEUS_PREFIX}_stage_duration_max_seconds"
+
+        lines = [
+            f"# HELP {duration} Time spent in each stage of the last run.",
+            f"# TYPE {duration} summary",
+        ]
+        for stage, stats in report["stages"].items():
+            labels = f'stage="{stage}"'
+            lines.extend(
+                [
+                    f'{duration}{{{labels},quantile="0.5"}} {stats["p50"]}',
+                    f'{duration}{{{labels},quantile="0.95"}} {stats["p95"]}',
+                    f"{duration}_sum{{{labels}}} {stats['total']}",
+                    f"{duration}_count{{{labels}}} {stats['count']}",
+                ]
+            )
+
+        lines.extend(
+            [
+                f"# HELP {max_duration} The slowest span of each stage.",
+                f"# TYPE {max_duration} gauge",
+            ]
+        )
+        lines.extend(
+            f'{max_duration}{{stage="{stage}"}} {stats["max"]}'
+            for stage, stats in report["stages"].items()
+        )
+
+        for name, value in report["counters"].items():
+            metric = f"{PROMETHEUS_PREFIX}_{metric_name(name)}_total"
+            lines.extend([f"# TYPE {metric} counter", f"{metric} {value}"])
+
+        for name in ("started", "duration"):
+            metric = f"{PROMETHEUS_PREFIX}_last_run_{name}_seconds"
+            lines.extend([f"# TYPE {metric} gauge", f"{metric} {report[name]}"])
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, **extra) -> Optional[dict]:
+        """
+        Write the report to `report_path` and `prometheus_path`.  Returns the
+        report, or `None` when tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        report = self.report(**extra)
+
+        try:
+            if self.report_path:
+                write_atomic(self.report_path, json.dumps(report, indent=2))
+
+            if self.prometheus_path:
+                write_atomic(self.prometheus_path, self.to_prometheus(report))
+        except OSError as e:
+            LOGGER.warning("Could not write the run report: %s", e)
+
+        return report
+
+
+tracer = Tracer()
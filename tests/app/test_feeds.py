@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+import requests
+
+from free_game_notifier import app
+from free_game_notifier.feed import steam
+
+FEED_PATH = "tests/steam/files/test-feed.xml"
+
+
+def no_network(*args, **kwargs):
+    raise requests.ConnectionError("no network")
+
+
+@pytest.fixture
+def sent(configuration, monkeypatch):
+    """Record the items that would be sent instead of notifying anything."""
+    result = []
+    monkeypatch.setattr(steam, "is_item_expired", lambda item: False)
+    monkeypatch.setattr(app, "process_all_notifiers", result.extend)
+    return result
+
+
+def test_serial(sent, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "feeds", {"steam": [FEED_PATH]})
+    monkeypatch.setitem(configuration, "workers", {"feeds": 1})
+    app.process_all_feeds()
+
+    assert len(sent) == 10
+
+
+def test_parallel(sent, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "feeds", {"steam": [FEED_PATH, FEED_PATH]})
+    monkeypatch.setitem(configuration, "workers", {"feeds": 2})
+    app.process_all_feeds()
+
+    assert len(sent) == 20
+
+
+def test_parallel_error_isolation(sent, configuration, monkeypatch):
+    """A feed that can't be read shouldn't stop the others"""
+    feeds = [FEED_PATH, "tests/steam/files/does-not-exist.xml", FEED_PATH]
+    monkeypatch.setitem(configuration, "feeds", {"steam": feeds})
+    monkeypatch.setitem(configuration, "workers", {"feeds": 3})
+    monkeypatch.setattr(requests.Session, "request", no_network)
+    app.process_all_feeds()
+
+    assert len(sent) == 20
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import random
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from free_game_notifier import app
+from free_game_notifier.feed.steam import Item
+from free_game_notifier.notifier import slack
+from free_game_notifier.notifier.slack import Notifier as SlackNotifier
+
+URLS = [
+    "https://hooks.example.com/1",
+    "https://hooks.example.com/2",
+    "https://hooks.example.com/3",
+    "https://other.example.com/1",
+    "https://other.example.com/1",
+]
+HOSTS = ["hooks.example.com", "other.example.com"]
+
+
+@pytest.fixture
+def items():
+    return [
+        Item(
+            title=f"Fan-out test game {index}",
+            summary="Test Summary",
+            steam_link="https://steam.com/game/1.html",
+            published="Wed, 30 Dec 2020 16:00:01 +0000",
+        )
+        for index in range(5)
+    ]
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Skip the store page and icon lookups when rendering."""
+    def mock_render(self, item):
+        return {"text": item.title}
+
+    monkeypatch.setattr(SlackNotifier, "render", mock_render)
+
+
+@pytest.fixture
+def added(cache, monkeypatch):
+    result = Counter()
+    original = cache.add
+
+    def mock_add(key, d):
+        result[key] += 1
+        original(key, d)
+
+    monkeypatch.setattr(cache, "add", mock_add)
+    return result
+
+
+def test_fan_out(items, added, rendered, cache, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": URLS})
+    monkeypatch.setitem(configuration, "workers", {"notifiers": 8, "per_host": 2})
+
+    lock = threading.Lock()
+    active = Counter()
+    most_active = Counter()
+    started = Counter()
+
+    # The first two sends to each host wait for each other, so this fails if
+    # they aren't sent at the same time.
+    barriers = {host: threading.Barrier(2) for host in HOSTS}
+
+    def mock_deliver(self, payload):
+        host = self.url.split("/")[2]
+        with lock:
+            active[host] += 1
+            most_active[host] = max(most_active[host], active[host])
+            started[host] += 1
+            first = started[host] <= 2
+
+        if first:
+            barriers[host].wait(timeout=5)
+
+        # Finish in a random order
+        time.sleep(random.random() / 100)
+
+        with lock:
+            active[host] -= 1
+
+        return True
+
+    monkeypatch.setattr(SlackNotifier, "deliver", mock_deliver)
+    app.process_all_notifiers(items)
+
+    # The duplicate URL should only be sent once per item
+    assert len(added) == len(items) * 4
+    assert set(added.values()) == {1}
+    assert all(key in cache for key in added)
+    assert most_active == {host: 2 for host in HOSTS}
+
+
+def test_fan_out_failures(
+    items, added, rendered, outbox, configuration, monkeypatch
+):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": URLS[:2]})
+    monkeypatch.setitem(configuration, "workers", {"notifiers": 4})
+
+    def mock_deliver(self, payload):
+        if self.url.endswith("2"):
+            raise ValueError("failed")
+        return True
+
+    monkeypatch.setattr(SlackNotifier, "deliver", mock_deliver)
+    app.process_all_notifiers(items)
+
+    assert len(added) == len(items)
+    assert len(outbox.due(now=float("inf"))) == len(items)
+
+
+def test_batch(items, added, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": URLS[:2]})
+    monkeypatch.setitem(configuration, "notifier_options", {"slack": {"batch": True}})
+
+    def mock_format_message(self, notifier):
+        section = {"type": "section", "text": {"type": "mrkdwn", "text": self.title}}
+        return {"text": self.title, "blocks": [section]}
+
+    monkeypatch.setattr(Item, "format_message", mock_format_message)
+    monkeypatch.setattr(slack, "MAX_BLOCKS", 6)
+
+    posts = []
+
+    def mock_deliver(self, slack_data):
+        if self.url.endswith("2") and len(posts) > 2:
+            raise ValueError("failed")
+
+        posts.append((self.url, slack_data))
+        return True
+
+    monkeypatch.setattr(SlackNotifier, "deliver", mock_deliver)
+    assert not app.process_all_notifiers(items)
+
+    # 5 items with dividers between them fit in 2 messages per URL, and the
+    # second message to the second URL failed.
+    assert [len(data["blocks"]) for _, data in posts] == [5, 3, 5]
+    assert posts[0][1]["text"] == ", ".join(item.title for item in items[:3])
+    assert len(added) == len(items) + 3
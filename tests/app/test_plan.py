@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+
+from free_game_notifier import app
+from free_game_notifier.feed import steam
+
+FEED_PATH = "tests/steam/files/test-feed.xml"
+URLS = ["https://hooks.example.com/1", "https://hooks.example.com/2"]
+
+
+@pytest.fixture
+def feed(configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": URLS})
+    monkeypatch.setattr(steam, "is_item_expired", lambda item: False)
+    return steam.Feed(url=FEED_PATH)
+
+
+def test_plan(feed, cache):
+    entries = feed.get_entries(count=10)
+
+    # Everything but the first entry has been sent everywhere, and the first
+    # entry has been sent to one of the webhooks.
+    for element in entries:
+        for url in URLS:
+            if (element is entries[0]) and (url == URLS[1]):
+                continue
+
+            cache.add(cache.get_key(element["title"], "slack", url), {})
+
+    plan = app.plan_feed(feed, count=10)
+    assert len(plan) == 1
+
+    element, pending = plan[0]
+    assert element["title"] == entries[0]["title"]
+    assert [url for _, _, url in pending] == [URLS[1]]
+
+
+def test_only_pending_items_are_built(feed, cache, monkeypatch):
+    for element in feed.get_entries(count=10)[1:]:
+        for url in URLS:
+            cache.add(cache.get_key(element["title"], "slack", url), {})
+
+    built = []
+    original = steam.Item.from_rss_element
+
+    def mock_from_rss_element(element):
+        built.append(element["title"])
+        return original(element)
+
+    sent = []
+    monkeypatch.setattr(steam.Item, "from_rss_element", mock_from_rss_element)
+    monkeypatch.setattr(app, "process_all_notifiers", sent.extend)
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+
+    assert len(built) == 1
+    assert [item.title for item in sent] == built
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    result = []
+
+    def mock_process_all_notifiers(items):
+        result.extend(items)
+        return True
+
+    monkeypatch.setattr(app, "process_all_notifiers", mock_process_all_notifiers)
+    return result
+
+
+def test_watermark(feed, cache, feed_state, sent):
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+    assert len(sent) == 10
+
+    newest = feed.get_entries(count=1)[0]
+    assert app.get_watermark(FEED_PATH)["ids"] == [newest["id"]]
+
+    # Nothing is past the watermark, even though nothing was cached
+    sent.clear()
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+    assert sent == []
+
+
+def test_rescan(feed, cache, feed_state, sent, configuration, monkeypatch):
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+
+    monkeypatch.setitem(configuration, "rescan", True)
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+    assert len(sent) == 20
+
+
+def test_failed_notifications_keep_watermark(feed, cache, feed_state, monkeypatch):
+    monkeypatch.setattr(app, "process_all_notifiers", lambda items: False)
+    app.process_feed("steam", steam.Feed, FEED_PATH)
+    assert app.get_watermark(FEED_PATH) is None
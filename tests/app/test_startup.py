@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+# The cumulative time allowed for `import free_game_notifier.app`, in
+# milliseconds.  It takes ~500ms when everything is imported eagerly.
+IMPORT_BUDGET_MS = int(os.environ.get("SFN_IMPORT_BUDGET_MS", 250))
+
+# These are only imported when they're first used.
+LAZY_MODULES = ["typer", "pendulum", "lxml", "jinja2", "feedparser", "requests", "yaml"]
+
+# Plugins are only imported when the configuration uses them.
+PLUGIN_MODULES = ["free_game_notifier.feed.steam", "free_game_notifier.notifier.slack"]
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+def test_lazy_imports():
+    result = run_python(
+        "-c",
+        "import sys, free_game_notifier.app; "
+        "print('\\n'.join(sys.modules))",
+    )
+    loaded = set(result.stdout.split())
+    assert not {name.split(".")[0] for name in loaded} & set(LAZY_MODULES)
+    assert not loaded & set(PLUGIN_MODULES)
+
+
+def test_import_time_budget():
+    result = run_python("-X", "importtime", "-c", "import free_game_notifier.app")
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "free_game_notifier.app":
+            assert int(cumulative) / 1000 < IMPORT_BUDGET_MS
+            break
+    else:
+        raise AssertionError("free_game_notifier.app was not imported")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import sqlite3
+import time
+
+import pytest
+
+from free_game_notifier.cache import Cache, JsonBackend, SqliteBackend
+from free_game_notifier.feed.steam import Item
+
+
+def make_item(title, posted):
+    return {
+        "title": title,
+        "summary": "Test Summary",
+        "steam_link": "https://steam.com/game/1.html",
+        "game_link": None,
+        "posted": posted,
+        "published": None,
+    }
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "json":
+        return JsonBackend(str(tmp_path / "cache.json"))
+
+    return SqliteBackend(str(tmp_path / "cache.sqlite3"))
+
+
+def test_add(backend):
+    backend.add("one", make_item("One", time.time()))
+
+    assert "one" in backend
+    assert "two" not in backend
+    assert backend.get("one")["title"] == "One"
+    assert len(backend) == 1
+
+
+def test_expired(backend):
+    now = time.time()
+    backend.add("old", make_item("Old", now - 100))
+    backend.add("new", make_item("New", now))
+    backend.add("unsent", make_item("Unsent", ""))
+
+    assert backend.expired(now - 10) == [("old", "Old")]
+
+    backend.remove(["old"])
+    assert "old" not in backend
+    assert len(backend) == 2
+
+
+def test_sqlite_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SqliteBackend(path)
+    backend.add("one", make_item("One", time.time()))
+    backend.save()
+    backend.close()
+
+    assert "one" in SqliteBackend(path)
+
+
+def test_sqlite_migration(tmp_path):
+    json_path = tmp_path / "cache.json"
+    json_path.write_text(json.dumps({"one": make_item("One", time.time())}))
+    db_path = str(tmp_path / "cache.sqlite3")
+
+    backend = SqliteBackend(db_path, json_path=str(json_path))
+    assert "one" in backend
+    backend.remove(["one"])
+    backend.save()
+    backend.close()
+
+    # The JSON file is only imported once
+    assert "one" not in SqliteBackend(db_path, json_path=str(json_path))
+
+
+def test_batch(tmp_path, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "dry-run", False)
+    path = tmp_path / "cache.json"
+    cache = Cache()
+    cache.configure(path=str(path), backend="json")
+
+    with cache.batch():
+        cache.add("one", make_item("One", time.time()))
+        cache.save()
+        assert not path.exists()
+
+        cache.add("two", make_item("Two", time.time()))
+        cache.save()
+
+    assert set(json.loads(path.read_text())["deliveries"]) == {"one", "two"}
+
+
+def test_item_stored_once(backend):
+    now = time.time()
+    backend.add("one", make_item("One", now))
+    backend.add("two", make_item("One", now + 1))
+    backend.add("three", make_item("Three", now))
+
+    assert backend.get("two")["posted"] == now + 1
+    assert "summary" not in backend.get("one")
+    assert len(backend) == 3
+
+    backend.remove(["one"])
+    assert backend.get("two")["title"] == "One"
+
+    backend.remove(["two"])
+    assert backend.get("two") is None
+
+
+def test_item_round_trip(backend, configuration):
+    item = Item(
+        title="Round trip",
+        summary="Test Summary",
+        steam_link="https://steam.com/game/1.html",
+        game_link="https://example.com/game",
+        posted=1.0,
+        published="Wed, 30 Dec 2020 16:00:01 +0000",
+    )
+    backend.add("one", item.to_dict())
+
+    cached = Item.from_dict(backend.get("one"))
+    assert cached == item
+    assert cached.summary == ""
+    assert (cached.game_link, cached.posted) == (item.game_link, 1.0)
+    assert cached.published_datetime == item.published_datetime
+
+
+def test_json_layout(tmp_path):
+    path = tmp_path / "cache.json"
+    backend = JsonBackend(str(path))
+    backend.add("one", make_item("One", 1.0))
+    backend.add("two", make_item("One", 2.0))
+    backend.add("three", make_item("Three", 3.0))
+    backend.remove(["three"])
+    backend.save()
+
+    data = json.loads(path.read_text())
+    assert data["version"] == 2
+    assert len(data["items"]) == 1
+    assert set(data["deliveries"]) == {"one", "two"}
+
+
+def test_json_conversion(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(
+        json.dumps({"one": make_item("One", 1.0), "two": make_item("One", 2.0)})
+    )
+
+    backend = JsonBackend(str(path))
+    assert backend.get("one") == {
+        "title": "One",
+        "steam_link": "https://steam.com/game/1.html",
+        "game_link": None,
+        "published": None,
+        "posted": 1.0,
+    }
+    backend.save()
+
+    data = json.loads(path.read_text())
+    assert len(data["items"]) == 1
+    assert JsonBackend(str(path)).get("two")["posted"] == 2.0
+
+
+def test_sqlite_upgrade(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """
+        CREATE TABLE cache (
+            key TEXT PRIMARY KEY, title TEXT, posted REAL, data TEXT NOT NULL
+        );
+        CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+        """
+    )
+    for key, posted in [("one", 1.0), ("two", 2.0)]:
+        connection.execute(
+            "INSERT INTO cache VALUES (?, ?, ?, ?)",
+            (key, "One", posted, json.dumps(make_item("One", posted))),
+        )
+    connection.commit()
+    connection.close()
+
+    backend = SqliteBackend(path)
+    assert backend.get("two")["posted"] == 2.0
+    assert backend.expired(1.5) == [("one", "One")]
+    assert backend.connection.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
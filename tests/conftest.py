@@ -4,6 +4,9 @@ import pytest
 import requests
 from free_game_notifier.cache import cache as app_cache
 from free_game_notifier.config import configuration as app_configuration
+from free_game_notifier.feed.state import feed_state as app_feed_state
+from free_game_notifier.outbox import outbox as app_outbox
+from free_game_notifier.render import payloads as app_payloads
 
 config_yaml = """
 ---
@@ -48,6 +51,24 @@ def cache(monkeypatch):
     return app_cache
 
 
+@pytest.fixture(autouse=True)
+def feed_state():
+    app_feed_state.configure()
+    return app_feed_state
+
+
+@pytest.fixture(autouse=True)
+def outbox():
+    app_outbox.configure()
+    return app_outbox
+
+
+@pytest.fixture(autouse=True)
+def payloads():
+    app_payloads.clear()
+    return app_payloads
+
+
 @pytest.fixture
 def configuration(monkeypatch):
     app_configuration.load_config(config_yaml)
@@ -67,7 +88,7 @@ def mock_request(monkeypatch):
         r.status_code = 200
         return r
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "request", mock_get)
 
 
 @pytest.fixture
@@ -77,4 +98,4 @@ def mock_request_raise(monkeypatch):
         r.status_code = 404
         return r
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "request", mock_get)
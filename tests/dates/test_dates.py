@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import datetime
+
+import pendulum
+
+from free_game_notifier import dates
+
+
+def test_parse_rfc822():
+    dt = dates.parse_rfc822("Wed, 30 Dec 2020 16:00:01 +0000")
+    assert dt == pendulum.datetime(2020, 12, 30, 16, 0, 1)
+    assert dt.utcoffset() == datetime.timedelta(0)
+
+    dt = dates.parse_rfc822("Wed, 30 Dec 2020 16:00:01 -0700")
+    assert dt == pendulum.datetime(2020, 12, 30, 23, 0, 1)
+
+
+def test_parse_rfc822_invalid():
+    assert dates.parse_rfc822("") is None
+    assert dates.parse_rfc822(None) is None
+    assert dates.parse_rfc822("not a date") is None
+
+
+def test_get_timezone():
+    assert dates.get_timezone("UTC") is datetime.timezone.utc
+    assert dates.get_timezone("America/Denver") is dates.get_timezone("America/Denver")
+
+
+def test_from_timestamp():
+    dt = dates.from_timestamp(1609344001, "America/Denver")
+    assert dt == pendulum.datetime(2020, 12, 30, 16, 0, 1)
+    assert dt.strftime("%Z") == "MST"
+
+
+def test_start_of_day():
+    dt = dates.start_of_day(datetime.date(2020, 12, 1))
+    assert dt == pendulum.datetime(2020, 12, 1)
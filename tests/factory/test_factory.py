@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import importlib.metadata
+import sys
+
+import pytest
+
+from free_game_notifier.factory import ClassFactory
+
+GROUP = "free_game_notifier.tests"
+
+
+def test_dotted_path(monkeypatch, tmp_path):
+    # Use a throwaway module so no other test sees a second copy of it
+    (tmp_path / "sfn_test_plugin.py").write_text("class Plugin:\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "sfn_test_plugin", raising=False)
+
+    factory = ClassFactory()
+    factory.register("plugin", "sfn_test_plugin:Plugin")
+    assert list(factory.keys()) == ["plugin"]
+    assert "sfn_test_plugin" not in sys.modules
+
+    assert factory["plugin"].__name__ == "Plugin"
+    assert "sfn_test_plugin" in sys.modules
+
+
+def test_entry_points(monkeypatch):
+    found = [
+        importlib.metadata.EntryPoint(
+            "cron", "free_game_notifier.scheduler:CronSchedule", GROUP
+        ),
+        importlib.metadata.EntryPoint(
+            "builtin", "free_game_notifier.scheduler:Scheduler", GROUP
+        ),
+    ]
+    groups = []
+
+    def mock_entry_points(group):
+        groups.append(group)
+        return [x for x in found if x.group == group]
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", mock_entry_points)
+
+    factory = ClassFactory(entry_point_group=GROUP)
+    factory.register("builtin", dict)
+    assert factory["builtin"] is dict
+    assert groups == []
+
+    assert factory["cron"].__name__ == "CronSchedule"
+    assert factory["builtin"] is dict
+    assert sorted(factory.keys()) == ["builtin", "cron"]
+    assert groups == [GROUP]
+
+
+def test_unknown():
+    factory = ClassFactory(entry_point_group=GROUP)
+    assert factory["missing"] is None
+    with pytest.raises(ValueError):
+        factory.get("missing")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import requests
+
+from free_game_notifier.http_client import http_client
+
+
+def test_stats(mock_request):
+    http_client.reset_stats()
+    http_client.get("https://example.com/one")
+    http_client.get("https://example.com/two")
+    http_client.post("https://hooks.example.com/three")
+
+    stats = http_client.stats()
+    assert stats["example.com"]["requests"] == 2
+    assert stats["hooks.example.com"]["requests"] == 1
+    assert stats["hooks.example.com"]["errors"] == 0
+
+
+def test_error_stats(mock_request_raise):
+    http_client.reset_stats()
+    http_client.get("https://example.com/missing")
+
+    assert http_client.stats()["example.com"]["errors"] == 1
+
+
+def test_default_timeout(monkeypatch):
+    kwargs = {}
+
+    def mock_request(self, method, url, **kw):
+        kwargs.update(kw)
+        r = requests.Response()
+        r.status_code = 200
+        return r
+
+    monkeypatch.setattr(requests.Session, "request", mock_request)
+    http_client.get("https://example.com/")
+    assert kwargs["timeout"] == http_client.timeout
+
+    http_client.get("https://example.com/", timeout=1)
+    assert kwargs["timeout"] == 1
+
+
+def test_backoff_max():
+    session = http_client.create_session(
+        retries=10, backoff_factor=10, backoff_max=2, pool_size=1
+    )
+    retry = session.get_adapter("https://example.com/").max_retries
+    for _ in range(5):
+        retry = retry.increment(method="GET", url="/")
+
+    assert retry.get_backoff_time() == 2.0
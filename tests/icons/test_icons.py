@@ -1,4 +1,16 @@
-from free_game_notifier.icons import icon_from_url
+import io
+
+import pytest
+import requests
+
+from free_game_notifier.icons import IconMatcher, icon_cache, icon_from_url
+
+
+@pytest.fixture
+def cached_icons():
+    icon_cache.configure(ttl=100, negative_ttl=100)
+    yield icon_cache
+    icon_cache.configure(ttl=0, negative_ttl=0)
 
 
 def test_steam_favicon(mock_request, configuration):
@@ -21,3 +33,56 @@ def test_invalid_url(mock_request_raise, configuration):
 def test_default_ubisoft(mock_request, configuration):
     x = icon_from_url("https://store.ubi.com/us/game/some_game.html")
     assert x == "https://www.ubisoft.com/favicon.ico"
+
+
+def test_settings_priority(mock_request, configuration):
+    """Configured icons are used before the defaults, even later in the URL"""
+    x = icon_from_url("https://store.steampowered.com/app/1?ref=test_steam")
+    assert x == "https://store.steampowered.com/favicon.ico"
+
+    x = icon_from_url("https://ubi.example.com/custom_steam")
+    assert x == "https://custom.store.steampowered.com/favicon.ico"
+
+
+def test_overlapping_keys():
+    """The first key found wins, even when a later key overlaps it"""
+    matcher = IconMatcher({"games": "A", "epicgames": "B"})
+    assert matcher.match("https://store.epicgames.com/p/x") == "A"
+
+    matcher = IconMatcher({"steam": "configured"}, {"steampowered": "default"})
+    assert matcher.match("https://store.steampowered.com/app/1") == "configured"
+
+    matcher = IconMatcher({"steampowered": "configured"}, {"steam": "default"})
+    assert matcher.match("https://steam.example.com/steampowered") == "configured"
+    assert matcher.match("https://steam.example.com/") == "default"
+    assert matcher.match("https://example.com/") is None
+
+    assert IconMatcher().match("https://example.com/") is None
+
+
+def test_favicon_cache(cached_icons, configuration, monkeypatch):
+    methods = []
+
+    def mock_request(self, method, url, **kwargs):
+        methods.append(method)
+        r = requests.Response()
+        r.status_code = 405 if method == "HEAD" else 200
+        r.raw = io.BytesIO(b"")
+        return r
+
+    monkeypatch.setattr(requests.Session, "request", mock_request)
+    x = icon_from_url("https://games.example.com/store/1.html")
+    assert x == "https://games.example.com/favicon.ico"
+    assert methods == ["HEAD", "GET"]
+
+    x = icon_from_url("https://games.example.com/store/2.html")
+    assert x == "https://games.example.com/favicon.ico"
+    assert len(methods) == 2
+
+
+def test_negative_cache(cached_icons, mock_request_raise, configuration, monkeypatch):
+    assert icon_from_url("https://missing.example.com/store/1.html") is None
+
+    # The missing icon is remembered, so we don't ask again
+    monkeypatch.setattr(requests.Session, "request", None)
+    assert icon_from_url("https://missing.example.com/store/2.html") is None
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from free_game_notifier.ignore import (
+    IgnoreRules,
+    RuleSet,
+    get_ignore_rules,
+    strip_wildcards,
+)
+
+
+def test_rule_set():
+    rules = RuleSet([".*big fish.*", "demo$", r"^(\w+) \1$"])
+    assert rules.search("A BIG FISH game") == ".*big fish.*"
+    assert rules.search("Some Game Demo") == "demo$"
+    assert rules.search("Some Game") is None
+    assert rules.search("hello hello") == r"^(\w+) \1$"
+    assert rules.search("") is None
+
+
+def test_strip_wildcards():
+    assert strip_wildcards(".*big fish.*") == "big fish"
+    assert strip_wildcards(".*.*demo") == "demo"
+    assert strip_wildcards("a.*b") == "a.*b"
+
+    # Lazy wildcards and escaped dots are left alone
+    assert strip_wildcards(".*?demo") == ".*?demo"
+    assert strip_wildcards(r"demo\.*") == r"demo\.*"
+    assert strip_wildcards(r"demo\\.*") == r"demo\\"
+
+
+def test_stripped_rules_match_the_same():
+    rules = RuleSet([".*big fish.*", r".*\.example\.com/.*", ".*fish"])
+    assert rules.pattern.pattern == r"(?:big fish)|(?:\.example\.com/)|(?:fish)"
+    assert rules.search("https://www.example.com/1") == r".*\.example\.com/.*"
+    assert rules.search("https://example.com") is None
+
+    # The first rule that matches is returned, not the earliest match
+    assert rules.search("A fish, a BIG FISH") == ".*big fish.*"
+
+
+def test_numbered_back_references():
+    """Rules that can't be combined are searched one at a time"""
+    rules = RuleSet([r"(\w+) \1", "demo"])
+    assert rules.pattern is None
+    assert rules.search("bye bye") == r"(\w+) \1"
+    assert rules.search("demo") == "demo"
+
+
+def test_hits():
+    rules = IgnoreRules({"titles": ["fish"], "urls": ["bigfishgames", "example"]})
+    assert rules.match_title("Big Fish")
+    assert rules.match_title("Big Fish")
+    assert not rules.match_title("Torchlight")
+    assert rules.match_urls([None, "https://www.bigfishgames.com/1"]) == "bigfishgames"
+
+    assert rules.hits[("titles", "fish")] == 2
+    assert rules.hits[("urls", "bigfishgames")] == 1
+    assert rules.hits[("urls", "example")] == 0
+
+
+def test_compiled_once_per_config(ignore_configuration):
+    rules = get_ignore_rules()
+    assert get_ignore_rules() is rules
+
+    ignore_configuration["ignore"] = {"titles": ["other"]}
+    assert get_ignore_rules() is not rules
+    assert get_ignore_rules().match_title("Other Game") == "other"
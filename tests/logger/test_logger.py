@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import io
+import json
+import logging
+
+import pytest
+
+from free_game_notifier import logger
+
+
+class Payload:
+    formatted = 0
+
+    def __repr__(self):
+        Payload.formatted += 1
+        return "Payload()"
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(logger.handler, "stream", stream)
+    yield stream
+    logger.configure_logging(queue=False)
+    logger.handler.setFormatter(logger.FORMATTERS["text"])
+
+
+def make_record(message="hello", created=1609344001.5):
+    record = logging.LogRecord(
+        "test", logging.INFO, "/app/free_game_notifier/app.py", 10, message, (), None
+    )
+    record.created = created
+    return record
+
+
+def test_lazy_pformat():
+    Payload.formatted = 0
+    log = logging.getLogger("test.lazy")
+    log.setLevel(logging.INFO)
+
+    log.debug("%s", logger.LazyPformat(Payload()))
+    assert Payload.formatted == 0
+
+    assert str(logger.LazyPformat({"payload": Payload()})) == "{'payload': Payload()}"
+    assert Payload.formatted == 1
+
+
+def test_json_formatter(configuration):
+    line = logger.JsonFormatter().format(make_record())
+    data = json.loads(line)
+
+    assert data["message"] == "hello"
+    assert data["level"] == "INFO"
+    assert data["path"] == "/app/free_game_notifier/app.py"
+    assert data["time"] == "2020-12-30T16:00:01.500+00:00"
+
+
+def test_format_time_cached(configuration):
+    formatter = logger.Formatter(datefmt="%H:%M:%S")
+
+    assert formatter.formatTime(make_record(created=1609344001.1), "%H:%M:%S") == (
+        "16:00:01"
+    )
+    assert formatter.formatTime(make_record(created=1609344001.9), "%H:%M:%S") == (
+        "16:00:01"
+    )
+    assert formatter.formatTime(make_record(created=1609344002.0), "%H:%M:%S") == (
+        "16:00:02"
+    )
+
+
+def test_queue(stream, configuration):
+    logger.configure_logging(log_format="json", queue=True)
+    logging.getLogger("test.queue").warning("queued %s", "message")
+    logger.stop_listener()
+
+    assert json.loads(stream.getvalue())["message"] == "queued message"
+
+
+def test_prepare_merges_args():
+    handler = logger.QueueHandler(None)
+    values = {"one": 1}
+
+    record = make_record("values: %s")
+    record.args = (values,)
+    prepared = handler.prepare(record)
+    values["two"] = 2
+
+    # The message shows the values at the time of the call
+    assert prepared.getMessage() == "values: {'one': 1}"
+
+    Payload.formatted = 0
+    record = make_record("payload: %s")
+    record.args = (logger.LazyPformat(Payload()),)
+    prepared = handler.prepare(record)
+    assert Payload.formatted == 0
+    assert prepared.getMessage() == "payload: Payload()"
+
+
+def test_stop_listener(stream, configuration):
+    logger.configure_logging(log_format="json", queue=True)
+    logger.stop_listener()
+
+    # Records logged after the listener has stopped are written directly
+    logging.getLogger("test.stopped").warning("after stopping")
+    assert "after stopping" in stream.getvalue()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        logger.configure_logging(log_format="xml")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+
+from free_game_notifier import app
+from free_game_notifier.notifier.slack import Notifier as SlackNotifier
+from free_game_notifier.outbox import DEAD, PENDING
+
+URL = "https://hooks.example.com/1"
+ITEM = {"title": "Outbox test game", "posted": ""}
+
+
+@pytest.fixture
+def queued(outbox):
+    outbox.configure(max_attempts=3, backoff=10, backoff_max=15)
+    outbox.add("key", "slack", URL, {"text": "rendered"}, ITEM)
+    return outbox
+
+
+def test_backoff(queued):
+    queued.failed("key", ValueError("failed"))
+    entry = queued.get("key")
+    assert entry["attempts"] == 1
+    assert entry["error"] == "failed"
+    assert not queued.due()
+    assert queued.due(now=entry["next_attempt"])
+
+    queued.failed("key")
+    assert queued.get("key")["next_attempt"] - entry["next_attempt"] <= 15
+
+    queued.failed("key")
+    assert queued.get("key")["status"] == DEAD
+    assert not queued.due(now=float("inf"))
+    assert queued.counts() == {PENDING: 0, DEAD: 1}
+
+
+def test_drain(queued, cache, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": [URL]})
+    delivered = []
+
+    def mock_deliver(self, payload):
+        delivered.append((self.url, payload))
+        return True
+
+    def mock_render(self, item):
+        raise AssertionError("Payloads in the outbox are not rendered again")
+
+    monkeypatch.setattr(SlackNotifier, "deliver", mock_deliver)
+    monkeypatch.setattr(SlackNotifier, "render", mock_render)
+
+    assert app.drain_outbox() == 1
+    assert delivered == [(URL, {"text": "rendered"})]
+    assert "key" not in queued
+    assert cache["key"]["posted"]
+
+
+def test_drain_unconfigured(queued, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": ["https://other"]})
+
+    def mock_deliver(self, payload):
+        raise AssertionError("The webhook is no longer configured")
+
+    monkeypatch.setattr(SlackNotifier, "deliver", mock_deliver)
+
+    assert app.drain_outbox() == 0
+    assert "key" in queued
+
+
+def test_queued_items_are_not_planned(queued, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": [URL]})
+    key = app.cache.get_key(ITEM["title"], "slack", URL)
+    queued.add(key, "slack", URL, {"text": "rendered"}, ITEM)
+
+    assert app.get_pending_targets(ITEM["title"], app.get_targets()) == []
+
+
+def test_dead_items_are_not_planned(queued, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "notifiers", {"slack": [URL]})
+    key = app.cache.get_key(ITEM["title"], "slack", URL)
+    queued.configure(max_attempts=1)
+    queued.add(key, "slack", URL, {"text": "rendered"}, ITEM)
+    queued.failed(key)
+    assert queued.get(key)["status"] == DEAD
+
+    assert app.get_pending_targets(ITEM["title"], app.get_targets()) == []
+    assert queued.due() == []
+
+    # Once the dead entry is pruned, the item can be sent again
+    queued.data[key]["updated"] -= 31 * 24 * 60 * 60
+    queued.prune(30)
+    assert app.get_pending_targets(ITEM["title"], app.get_targets()) == [
+        (key, "slack", URL)
+    ]
+
+
+def test_prune(queued):
+    queued.add("old", "slack", URL, {"text": "rendered"}, ITEM)
+    queued.data["old"]["updated"] -= 31 * 24 * 60 * 60
+
+    assert queued.prune(30) == 1
+    assert "old" not in queued
+    assert "key" in queued
+
+
+def test_saved_on_error(queued, configuration, monkeypatch):
+    saved = []
+
+    def mock_process_all_feeds():
+        raise RuntimeError("failed")
+
+    monkeypatch.setattr(app, "process_all_feeds", mock_process_all_feeds)
+    monkeypatch.setattr(queued, "save", lambda: saved.append(True))
+
+    with pytest.raises(RuntimeError):
+        app.run_once()
+
+    assert saved
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+import requests
+
+from free_game_notifier import ratelimit
+from free_game_notifier.http_client import http_client
+from free_game_notifier.notifier.slack import Notifier as SlackNotifier
+from free_game_notifier.ratelimit import TokenBucket, parse_retry_after
+
+WEBHOOK = "https://hooks.example.com/services/T000/B000/secret"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1.0]
+
+    clock.now += 10
+    assert bucket.reserve() == 0
+
+    bucket.pause(5)
+    assert bucket.reserve() == 5
+
+
+def test_pause_spaces_waiters():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, burst=3, clock=clock)
+
+    bucket.pause(10)
+    assert [bucket.reserve() for _ in range(4)] == [10, 11, 12, 13]
+
+    # Once the pause is over, the bucket refills as usual
+    clock.now += 20
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+
+def test_config_change():
+    limiter = ratelimit.RateLimiter(sleep=lambda seconds: None)
+    bucket = limiter.get_bucket(WEBHOOK, rate=1, burst=1)
+    bucket.pause(60)
+
+    assert limiter.get_bucket(WEBHOOK, rate=1, burst=1) is bucket
+
+    # New settings get a new bucket, but it's still paused
+    new_bucket = limiter.get_bucket(WEBHOOK, rate=5, burst=3)
+    assert new_bucket is not bucket
+    assert (new_bucket.rate, new_bucket.capacity) == (5, 3)
+    assert new_bucket.reserve() > 50
+
+    limiter.acquire(WEBHOOK, rate=5, burst=3)
+    assert "secret" not in str(limiter.report())
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    date = "Wed, 30 Dec 2020 16:00:10 GMT"
+    assert parse_retry_after(date, now=lambda: 1609344001) == 9
+
+
+def make_response(status_code, headers=None):
+    r = requests.Response()
+    r.status_code = status_code
+    r.headers.update(headers or {})
+    r.url = WEBHOOK
+    return r
+
+
+def test_retry_after(configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "dry-run", False)
+    responses = [make_response(429, {"Retry-After": "2"}), make_response(200)]
+    monkeypatch.setattr(http_client, "post", lambda url, **kwargs: responses.pop(0))
+
+    slept = []
+    limiter = ratelimit.RateLimiter(sleep=slept.append)
+    monkeypatch.setattr("free_game_notifier.notifier.slack.rate_limiter", limiter)
+
+    assert SlackNotifier(url=WEBHOOK).deliver({"text": "test"})
+    assert 2 <= slept[0] <= 3
+
+    stats = limiter.stats()[WEBHOOK]
+    assert (stats["requests"], stats["throttled"], stats["gave_up"]) == (2, 1, 0)
+    assert "secret" not in ratelimit.describe(WEBHOOK)
+
+
+def test_gives_up(configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "dry-run", False)
+    monkeypatch.setattr(
+        http_client,
+        "post",
+        lambda url, **kwargs: make_response(429, {"Retry-After": "3600"}),
+    )
+
+    limiter = ratelimit.RateLimiter(sleep=lambda seconds: None)
+    monkeypatch.setattr("free_game_notifier.notifier.slack.rate_limiter", limiter)
+
+    with pytest.raises(requests.HTTPError):
+        SlackNotifier(url=WEBHOOK).deliver({"text": "test"})
+
+    assert limiter.stats()[WEBHOOK]["gave_up"] == 1
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+
+from free_game_notifier.abc.notifier import Notifier
+from free_game_notifier.feed.steam import Item
+from free_game_notifier.notifier.slack import Notifier as SlackNotifier
+from free_game_notifier.render import RendererRegistry, renderers
+
+
+class EchoNotifier(Notifier):
+    notifier_type = "echo"
+
+
+@pytest.fixture
+def item():
+    return Item(
+        title="Render test game",
+        summary="Test Summary",
+        steam_link="https://steamcommunity.com/groups/freegamesfinders/1",
+        published="Wed, 30 Dec 2020 16:00:01 +0000",
+    )
+
+
+def test_slack(item, mock_request):
+    data = item.format_message(SlackNotifier(url=None))
+    assert data["text"] == item.title
+
+
+def test_unknown_notifier(item):
+    with pytest.raises(NotImplementedError):
+        item.format_message(EchoNotifier(url=None))
+
+
+def test_register(item, monkeypatch):
+    monkeypatch.setitem(renderers.renderers, ("steam", "echo"), None)
+
+    @renderers.register("steam", "echo")
+    def render_echo(item):
+        return item.title.upper()
+
+    assert item.format_message(EchoNotifier(url=None)) == item.title.upper()
+
+
+def test_compiled_once():
+    registry = RendererRegistry()
+    registry.register_template("test", "Hello {{ name }}")
+
+    template = registry.get_template("test")
+    assert registry.get_template("test") is template
+    assert template.render(name="World") == "Hello World"
+
+
+def test_bytecode_cache(tmp_path):
+    registry = RendererRegistry()
+    registry.configure(bytecode_cache_dir=str(tmp_path))
+    registry.register_template("test", "Hello {{ name }}")
+    registry.get_template("test")
+
+    assert list(tmp_path.iterdir())
+
+
+def test_render_once_per_notifier_type(item, payloads, monkeypatch):
+    rendered = []
+
+    def render_echo(item):
+        rendered.append(item.title)
+        return {"text": item.title}
+
+    monkeypatch.setitem(renderers.renderers, ("steam", "echo"), render_echo)
+
+    notifiers = [EchoNotifier(url=f"https://hooks.example.com/{i}") for i in range(3)]
+    results = [notifier.render(item) for notifier in notifiers]
+
+    assert rendered == [item.title]
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+
+from free_game_notifier.scheduler import CronSchedule, Scheduler, parse_field
+
+
+def test_parse_field():
+    assert parse_field("*/15", 0, 59) == {0, 15, 30, 45}
+    assert parse_field("1-5", 0, 23) == {1, 2, 3, 4, 5}
+    assert parse_field("1,10-20/5", 1, 31) == {1, 10, 15, 20}
+    assert parse_field("5/20", 0, 59) == {5, 25, 45}
+
+    with pytest.raises(ValueError):
+        parse_field("60", 0, 59)
+
+
+def test_every_two_hours():
+    schedule = CronSchedule("0 */2 * * *")
+    now = datetime.datetime(2020, 12, 31, 23, 15)
+    assert schedule.next_after(now) == datetime.datetime(2021, 1, 1, 0, 0)
+
+    now = datetime.datetime(2021, 1, 1, 0, 0)
+    assert schedule.next_after(now) == datetime.datetime(2021, 1, 1, 2, 0)
+
+
+def test_weekday():
+    # 2021-01-01 was a Friday; the next Monday is the 4th.
+    schedule = CronSchedule("30 9 * * 1")
+    now = datetime.datetime(2021, 1, 1, 12, 0)
+    assert schedule.next_after(now) == datetime.datetime(2021, 1, 4, 9, 30)
+
+
+def test_day_or_weekday():
+    # Restricting both the day of month and day of week matches either one
+    schedule = CronSchedule("0 0 15 * 1")
+    now = datetime.datetime(2021, 1, 5, 12, 0)
+    assert schedule.next_after(now) == datetime.datetime(2021, 1, 11, 0, 0)
+
+
+def test_month():
+    schedule = CronSchedule("0 0 1 6 *")
+    now = datetime.datetime(2021, 7, 1, 0, 0)
+    assert schedule.next_after(now) == datetime.datetime(2022, 6, 1, 0, 0)
+
+
+def test_jitter():
+    scheduler = Scheduler(CronSchedule("0 * * * *"), jitter=60)
+    now = datetime.datetime(2021, 1, 1, 12, 30)
+    next_run = scheduler.next_run(now)
+    assert datetime.datetime(2021, 1, 1, 13, 0) <= next_run
+    assert next_run <= datetime.datetime(2021, 1, 1, 13, 1)
+
+
+def test_stop():
+    scheduler = Scheduler(CronSchedule("* * * * *"))
+    scheduler.stop()
+    scheduler.run(lambda: pytest.fail("should not run"))
+    assert scheduler.stopped
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+import requests
+
+from free_game_notifier.feed.state import feed_state, ratings_cache
+from free_game_notifier.feed.steam import Feed, Item
+from free_game_notifier.http_client import ResponseTooLarge
+
+FEED_URL = "https://steamcommunity.example.com/rss/"
+
+
+@pytest.fixture
+def feed_xml():
+    with open("tests/steam/files/test-feed.xml", "rb") as fh:
+        return fh.read()
+
+
+@pytest.fixture
+def server(feed_xml, monkeypatch):
+    """A fake server that supports `If-None-Match`"""
+    requests_made = []
+
+    def mock_request(self, method, url, headers=None, **kwargs):
+        requests_made.append(headers or {})
+        r = requests.Response()
+        r.url = url
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            r.status_code = 304
+            r.raw = io.BytesIO(b"")
+        else:
+            r.status_code = 200
+            r.headers["ETag"] = '"v1"'
+            r.headers["Last-Modified"] = "Wed, 30 Dec 2020 16:00:01 GMT"
+            r.raw = io.BytesIO(feed_xml)
+
+        return r
+
+    feed_state.configure()
+    monkeypatch.setattr(requests.Session, "request", mock_request)
+    return requests_made
+
+
+def test_conditional_get(server, configuration):
+    feed = Feed(url=FEED_URL)
+    assert not feed.not_modified
+    assert feed._feed["items"]
+    assert "If-None-Match" not in server[0]
+
+    feed = Feed(url=FEED_URL)
+    assert feed.not_modified
+    assert server[1]["If-None-Match"] == '"v1"'
+    assert server[1]["If-Modified-Since"] == "Wed, 30 Dec 2020 16:00:01 GMT"
+    assert "gzip" in server[1]["Accept-Encoding"]
+
+
+def test_max_bytes(server, configuration, monkeypatch):
+    monkeypatch.setitem(configuration, "feed_max_bytes", 1024)
+
+    with pytest.raises(ResponseTooLarge):
+        Feed.fetch(FEED_URL)
+
+    assert FEED_URL not in feed_state
+
+
+def test_prefetch(configuration, monkeypatch):
+    store_links = [
+        "https://store.steampowered.com/app/1/One/",
+        "https://store.steampowered.com/app/2/Two/",
+        "https://store.steampowered.com/app/1/One/",
+    ]
+    items = [
+        Item(
+            title=f"Prefetch test game {index}",
+            summary=f'<a href="{link}">Steam</a>',
+            steam_link="https://steamcommunity.com/groups/freegamesfinders/1",
+            published="Wed, 30 Dec 2020 16:00:01 +0000",
+        )
+        for index, link in enumerate(store_links)
+    ]
+
+    loaded = []
+
+    def mock_load_steam_ratings(self):
+        loaded.append(self.steam_store_link)
+        return {"all": "Positive", "recent": "Positive"}
+
+    ratings_cache.configure()
+    monkeypatch.setattr(Item, "load_steam_ratings", mock_load_steam_ratings)
+    Feed(url=FEED_URL, parsed={"items": []}).prefetch(items, workers=2)
+
+    assert sorted(loaded) == sorted(set(store_links))
+    for item in items:
+        item.get_steam_ratings()
+
+    assert len(loaded) == 2
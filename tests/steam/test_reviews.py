@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from free_game_notifier.feed.steam import Feed, Item, steam_ratings
+from free_game_notifier.feed.state import ratings_cache
+from free_game_notifier.feed.steam import Feed, Item, steam_app_id, steam_ratings
 
 # Solitairica only has "All Reviews"
 # Last Light Redux has "All" and "Recent" reviews.
@@ -29,3 +30,64 @@ def test_last_light(last_light):
     ratings = steam_ratings(html)
     assert ratings["overall"]
     assert ratings["recent"]
+
+
+def test_ratings_cache(solitairica, monkeypatch):
+    """Ratings are cached by the app ID"""
+    ratings_cache.configure()
+    item = Item.from_rss_element(solitairica)
+    assert item.steam_store_link
+
+    with open("tests/steam/files/solitairica.html") as fh:
+        html = fh.read()
+
+    fetched = []
+
+    def mock_get_steam_store_html():
+        fetched.append(item.steam_store_link)
+        return html
+
+    monkeypatch.setattr(item, "get_steam_store_html", mock_get_steam_store_html)
+
+    assert item.get_steam_ratings() == steam_ratings(html)
+    assert item.get_steam_ratings() == steam_ratings(html)
+    assert len(fetched) == 1
+    assert steam_app_id(item.steam_store_link) in ratings_cache
+
+
+def test_ratings_cache_without_reviews(solitairica, monkeypatch):
+    """Pages without any reviews are cached for `negative_ttl`"""
+    ratings_cache.configure(ttl=100, stale_ttl=100, negative_ttl=10)
+    item = Item.from_rss_element(solitairica)
+    app_id = steam_app_id(item.steam_store_link)
+
+    page = "<html><body><div class='game_description'>New!</div></body></html>"
+    assert steam_ratings(page) == {"overall": "", "recent": ""}
+    monkeypatch.setattr(item, "get_steam_store_html", lambda: page)
+
+    assert item.get_steam_ratings() is None
+    assert ratings_cache.ttl_for(ratings_cache[app_id]["value"]) == 10
+
+    ratings_cache[app_id]["updated"] -= 20
+    with open("tests/steam/files/solitairica.html") as fh:
+        html = fh.read()
+
+    monkeypatch.setattr(item, "get_steam_store_html", lambda: html)
+    assert item.get_steam_ratings() == steam_ratings(html)
+
+
+def test_ratings_values():
+    with open("tests/steam/files/last_light.html") as fh:
+        ratings = steam_ratings(fh.read())
+
+    assert ratings == {"overall": "Very Positive", "recent": "Overwhelmingly Positive"}
+
+
+def test_ratings_without_reviews_region():
+    """Pages without the summary bars fall back to parsing the whole page"""
+    page = """
+    <html><body><div class="user_reviews">
+        <div>Overall Reviews: <span class="game_review_summary">Mixed</span></div>
+    </div></body></html>
+    """
+    assert steam_ratings(page) == {"overall": "Mixed", "recent": ""}
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import datetime
+import io
+
+import feedparser
+import pytest
+
+from free_game_notifier.feed.rss import parse_entries
+from free_game_notifier.feed.steam import Feed
+
+ITEM = """
+<item>
+    <title>Game {index}</title>
+    <description><![CDATA[Free on <a href="https://store.steampowered.com/app/{index}/">Steam</a>]]></description>
+    <link>https://steamcommunity.com/groups/freegamesfinders/announcements/detail/{index}</link>
+    <pubDate>Wed, {day:02d} Dec 2020 16:00:01 +0000</pubDate>
+    <author>nobody@example.com</author>
+    <guid>https://steamcommunity.com/groups/freegamesfinders/announcements/detail/{index}</guid>
+</item>
+"""
+
+
+def make_feed(count=20):
+    """A well-formed feed with one entry per day, newest first."""
+    items = "".join(
+        ITEM.format(index=index, day=count - index) for index in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0"><channel><title>Free Games</title>'
+        f"{items}</channel></rss>"
+    ).encode("utf-8")
+
+
+def test_stops_at_count():
+    entries = parse_entries(io.BytesIO(make_feed()), count=5)
+    assert [entry["title"] for entry in entries] == [f"Game {i}" for i in range(5)]
+
+
+def test_stops_at_start_date():
+    start_date = datetime.datetime(2020, 12, 15, tzinfo=datetime.timezone.utc)
+    entries = parse_entries(io.BytesIO(make_feed()), start_date=start_date)
+    # Dec 20 through Dec 15
+    assert len(entries) == 6
+
+
+@pytest.mark.parametrize("path", [None, "tests/steam/files/test-feed.xml"])
+def test_same_fields_as_feedparser(path):
+    if path:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    else:
+        data = make_feed(3)
+
+    expected = feedparser.parse(data).entries
+    entries = parse_entries(io.BytesIO(data))
+    assert len(entries) == len(expected)
+
+    for entry, other in zip(entries, expected):
+        for key in ("title", "summary", "link", "published", "id"):
+            assert entry[key] == other[key]
+
+
+def test_summary_like_feedparser():
+    """The summary HTML is cleaned up the same way feedparser does"""
+    data = make_feed(1).replace(
+        b"Free on <a", b'Free<br>on <a target="_blank" onclick="x()"'
+    )
+    (entry,) = parse_entries(io.BytesIO(data))
+    assert entry["summary"].startswith('Free<br />on <a href="https://store')
+    assert "onclick" not in entry["summary"]
+    assert entry["summary"] == feedparser.parse(data).entries[0]["summary"]
+
+
+def test_local_file(tmp_path, configuration):
+    path = tmp_path / "feed.xml"
+    path.write_bytes(make_feed())
+
+    feed = Feed(url=str(path), count=10)
+    assert len(feed._feed["items"]) == 10
+    assert feed._feed["filtered"]
+
+
+def test_full_read_is_streamed(configuration):
+    feed = Feed(url="tests/steam/files/test-feed.xml")
+    assert feed._feed["filtered"]
+    assert len(feed._feed["items"]) == 11
+
+
+@pytest.mark.parametrize("parser", ["stream", "feedparser"])
+def test_malformed_feed(tmp_path, configuration, parser, monkeypatch):
+    """A raw `<br>` in a description means the feed has to be read by feedparser"""
+    path = tmp_path / "feed.xml"
+    path.write_bytes(make_feed().replace(b"<description>", b"<description>Hi<br>", 1))
+
+    monkeypatch.setitem(configuration, "feed_parser", parser)
+    feed = Feed(url=str(path))
+    assert not feed._feed.get("filtered")
+    assert feed._feed["items"]
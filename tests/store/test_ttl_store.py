@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from free_game_notifier.store import TtlStore
+
+
+@pytest.fixture
+def store():
+    store = TtlStore()
+    store.configure(ttl=100, stale_ttl=100, max_entries=3)
+    return store
+
+
+def age(store, key, seconds):
+    store.data[key]["updated"] -= seconds
+
+
+def test_fresh(store):
+    assert store.get_or_load("one", lambda: 1) == 1
+    assert store.get_or_load("one", lambda: 2) == 1
+
+
+def test_stale(store):
+    store.get_or_load("one", lambda: 1)
+    age(store, "one", 150)
+
+    # The stale value is returned while it's refreshed in the background
+    assert store.get_or_load("one", lambda: 2) == 1
+    store.wait()
+    assert store.get_or_load("one", lambda: 3) == 2
+
+
+def test_expired(store):
+    store.get_or_load("one", lambda: 1)
+    age(store, "one", 250)
+
+    assert store.get_or_load("one", lambda: 2) == 2
+
+
+def test_negative_ttl(store):
+    store.configure(ttl=100, stale_ttl=100, negative_ttl=10)
+    store.get_or_load("one", lambda: None)
+    assert store.get_or_load("one", lambda: 1) is None
+
+    # An empty value expires after `negative_ttl`, and isn't served stale
+    age(store, "one", 20)
+    assert store.get_or_load("one", lambda: 1) == 1
+
+
+def test_max_entries(store):
+    for index in range(5):
+        store.set(str(index), index)
+        time.sleep(0.001)
+
+    assert set(store.data) == {"2", "3", "4"}
+
+    # Updating an entry makes it the newest
+    store.set("2", 2)
+    store.set("5", 5)
+    assert set(store.data) == {"2", "4", "5"}
+
+
+def test_persist(tmp_path):
+    path = str(tmp_path / "store.json")
+    store = TtlStore()
+    store.configure(path=path)
+    store.set("one", 1)
+    store.save()
+
+    store = TtlStore()
+    store.configure(path=path)
+    assert store.get_or_load("one", lambda: 2) == 1
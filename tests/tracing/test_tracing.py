@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from free_game_notifier import app
+from free_game_notifier.feed.steam import Feed
+from free_game_notifier.store import TtlStore
+from free_game_notifier.tracing import NULL_SPAN, percentile, tracer
+
+
+@pytest.fixture
+def enabled(tmp_path):
+    tracer.configure(
+        enabled=True,
+        report_path=str(tmp_path / "run_report.json"),
+        prometheus_path=str(tmp_path / "sfn.prom"),
+    )
+    yield tracer
+    tracer.configure()
+
+
+def test_disabled():
+    tracer.configure()
+    assert tracer.span("stage") is NULL_SPAN
+
+    @tracer.traced("stage")
+    def func():
+        return 1
+
+    assert func() == 1
+    tracer.count("counter")
+
+    assert tracer.report()["stages"] == {}
+    assert tracer.report()["counters"] == {}
+    assert tracer.write_report() is None
+
+
+def test_percentile():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([3.0], 0.95) == 3
+    assert percentile([], 0.5) == 0
+
+
+def test_spans(enabled):
+    @tracer.traced("traced")
+    def func():
+        return 1
+
+    assert func() == 1
+    assert func.__name__ == "func"
+
+    for _ in range(3):
+        with tracer.span("block"):
+            pass
+
+    with pytest.raises(ValueError):
+        with tracer.span("failed"):
+            raise ValueError()
+
+    stages = tracer.report()["stages"]
+    assert stages["traced"]["count"] == 1
+    assert stages["block"]["count"] == 3
+    assert stages["failed"]["count"] == 1
+    assert stages["block"]["max"] >= stages["block"]["p95"] >= stages["block"]["p50"]
+
+
+def test_cache_counters(enabled):
+    store = TtlStore(name="ratings")
+    store.configure(ttl=100)
+
+    store.get_or_load("one", lambda: 1)
+    store.get_or_load("one", lambda: 2)
+    store.get_or_load("one", lambda: 3)
+
+    counters = tracer.report()["counters"]
+    assert counters["cache.ratings.miss"] == 1
+    assert counters["cache.ratings.hit"] == 2
+
+
+def test_write_report(enabled, tmp_path):
+    with tracer.span("cache.save"):
+        pass
+
+    tracer.count("http.bytes_received", 100)
+    tracer.count("http.bytes_received", 50)
+
+    tracer.write_report(outbox={"pending": 1})
+
+    with open(tmp_path / "run_report.json") as fh:
+        report = json.load(fh)
+
+    assert report["stages"]["cache.save"]["count"] == 1
+    assert report["counters"]["http.bytes_received"] == 150
+    assert report["outbox"] == {"pending": 1}
+
+    prom = (tmp_path / "sfn.prom").read_text()
+    assert 'sfn_stage_duration_seconds_count{stage="cache.save"} 1' in prom
+    assert 'sfn_stage_duration_seconds{stage="cache.save",quantile="0.95"}' in prom
+    assert "sfn_http_bytes_received_total 150" in prom
+    assert "sfn_last_run_duration_seconds" in prom
+
+
+def test_parse_in_worker(enabled, configuration):
+    result, seconds = app.parse_feed(Feed, None)
+    assert result["not_modified"]
+
+    # The parse time from the worker is recorded in the main process
+    future = Future()
+    future.set_result((result, 0.25))
+    app.process_feed("steam", Feed, "https://example.com/rss", parsed=future)
+
+    assert tracer.report()["stages"]["feed.parse"]["max"] == 0.25